@@ -1,55 +1,188 @@
 from __future__ import annotations
-from typing import List, Optional
+from argparse import ArgumentTypeError
+from array import array
+import atexit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from itertools import accumulate, islice
+import json
+import os
+import sys
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional
 
 import codepost
 
+from CPCache import CPCache
+from CPManifest import CPManifest
+from FileUtils import FileInfo
+from CPRateLimiter import CPRateLimiter
+from CPSession import CPSession
+
 # ----------------------------------------------------------------------
 
-class CPComment:
+def _objectID(obj) -> int:
+    """
+    :param obj: codepost.io object, its id, or a dictionary of its fields
+    :return: the codepost.io id of the object
+    """
+    if isinstance(obj, int):
+        return obj
+    if isinstance(obj, dict):
+        return obj["id"]
+    return obj.id
+
+def _fieldsOf(obj) -> dict:
+    """
+    :param obj: codepost.io object (possibly one of the SDK's lazily loaded objects), its id, or a dictionary of its fields
+    :return: dictionary of the fields the object already holds without making a request
+    """
+    if isinstance(obj, int):
+        return {"id": obj}
+    if isinstance(obj, dict):
+        return obj
+    if hasattr(type(obj), "_inner"):
+        # lazily loaded SDK object that only knows its id until it is retrieved
+        if obj._inner is None:
+            return {"id": obj.id}
+        obj = obj._inner
+    return obj._data
+
+def _retrieveFields(kind: str, obj, version: str = None) -> dict:
+    """
+    retrieve the fields of a codepost.io object, using the copy in CP.cache if it is current
+    :param kind: name of the codepost module object used to retrieve it ("file", "comment", "rubric_category", ...)
+    :param obj: codepost.io object, its id, or a dictionary of its fields
+    :param version: version a cached copy must have to be used (the dateEdited of the submission it belongs to)
+    :return: dictionary of the fields of the object
+    """
+    objectID = _objectID(obj)
+    if CP.cache is not None and not CP.refresh:
+        fields = CP.cache.get(kind, objectID, version)
+        if fields is not None:
+            return fields
+    fields = dict(getattr(codepost, kind).retrieve(id=objectID)._data)
+    if CP.cache is not None:
+        CP.cache.put(kind, objectID, fields, version)
+    return fields
+
+def _resource(kind: str, fields: dict):
+    """
+    :param kind: name of the codepost module object for the object ("assignment", "submission", ...)
+    :param fields: dictionary of the fields of the object
+    :return: codepost SDK object holding fields (as if it was retrieved with the SDK)
+    """
+    return type(getattr(codepost, kind))(**fields)
+
+def _loaded(wrapper):
+    """
+    :param wrapper: CPAPI wrapper made with all the fields of its object
+    :return: wrapper marked as retrieved so using a field it does not have does not retrieve it again
+    """
+    wrapper._retrieved = True
+    return wrapper
+
+def _positiveInt(text: str) -> int:
+    """
+    :param text: value of a command line option
+    :return: the value as an int (raises ArgumentTypeError if it is not a whole number of at least 1)
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 1:
+        raise ArgumentTypeError(f"must be at least 1: {value}")
+    return value
+
+# ----------------------------------------------------------------------
+
+class _LazyFields:
+    """
+    base class for the wrappers of codepost.io objects
+    fields are read from the data the wrapper is made with (a parent's payload, a created object, or a cached rubric)
+    and the object is only retrieved the first time a field that is not in that data is used
+    """
+
+    # name of the codepost module object used to retrieve the object
+    _kind = None
+
+    def __init__(self, obj, version: str = None):
+        """
+        :param obj: codepost.io object, its id, or a dictionary of its fields
+        :param version: version a cached copy must have to be used (the dateEdited of the submission it belongs to)
+        """
+        self._data = dict(_fieldsOf(obj))
+        self._id = _objectID(obj)
+        self._version = version
+        self._retrieved = False
+
+    def _field(self, name: str):
+        """
+        :param name: name of the codepost.io field
+        :return: the value of the field, retrieving the object if the field is not already known
+        """
+        if name not in self._data and not self._retrieved:
+            self._load()
+        return self._data.get(name)
+
+    def _load(self) -> None:
+        """retrieve all the fields of the object (from the cache if it has a current copy)"""
+        if not self._retrieved:
+            self._data.update(_retrieveFields(self._kind, self._id, self._version))
+            self._retrieved = True
+
+# ----------------------------------------------------------------------
+
+class CPComment(_LazyFields):
     """class for accessing a codepost.io Comment object"""
 
-    def __init__(self, comment):
+    _kind = "comment"
+
+    def __init__(self, comment, version: str = None):
         """
-        :param comment: codepost.io comment
+        :param comment: codepost.io comment (or its id or a dictionary of its fields)
+        :param version: dateEdited of the submission the comment belongs to (used to check the cached copy)
         """
-        self._comment = comment
-        comment.retrieve(id=comment.id)
-        self._rubricCommentID = comment.rubricComment
-        # have pointDelta default to zero if does not have one
-        if comment.pointDelta is None:
-            self._pointDelta = 0.0
-        else:
-            self._pointDelta = comment.pointDelta
+        super().__init__(comment, version)
+
+    def ID(self):
+        return self._id
 
     def text(self) -> str:
         """
         :return: text of the comment with trailing whitespace stripped
         """
-        return self._comment.text.rstrip()
+        return self._field("text").rstrip()
 
     def startLine(self) -> int:
         """
         :return: starting line number of the code that the comment is for
         """
-        return self._comment.startLine
+        return self._field("startLine")
 
     def endLine(self) -> int:
         """
         :return: ending line number of the code that the comment is for
         """
-        return self._comment.endLine
+        return self._field("endLine")
 
     def pointDelta(self) -> float:
         """
         :return: point delta for the comment
         """
-        return self._pointDelta
+        # have pointDelta default to zero if does not have one
+        pointDelta = self._field("pointDelta")
+        if pointDelta is None:
+            return 0.0
+        return pointDelta
 
     def rubricCommentID(self):
         """
         :return: the codepost.io id for the rubric comment this comment is associated with (may be None)
         """
-        return self._rubricCommentID
+        return self._field("rubricComment")
 
     def __lt__(self, other: CPComment) -> bool:
         """
@@ -57,33 +190,29 @@ class CPComment:
         :param other:
         :return: True if self's starting line number is less than other's starting line number
         """
-        return self._comment.startLine < other._comment.startLine
+        return self.startLine() < other.startLine()
 
     def __str__(self) -> str:
-        if self._pointDelta != 0.0:
-            return f"{self.text()} ({(-self._comment.pointDelta):0.1f})"
+        if self.pointDelta() != 0.0:
+            return f"{self.text()} ({(-self.pointDelta()):0.1f})"
         else:
             return self.text()
 
-class CPRubricComment:
+class CPRubricComment(_LazyFields):
     """class for accessing codepost.io rubric comment"""
 
+    _kind = "rubric_comment"
+
     def __init__(self, comment, category: CPRubricCategory):
         """
-        :param comment: the codepost.io rubric comment
+        :param comment: the codepost.io rubric comment (or its id or a dictionary of its fields)
         :param category: the rubric category for this rubric comment
         """
-        self._comment = comment
+        super().__init__(comment)
         self._category = category
-        comment.retrieve(id=comment.id)
-        self._text = comment.text
-        if comment.pointDelta is None:
-            self._pointDelta = 0.0
-        else:
-            self._pointDelta = comment.pointDelta
 
     def ID(self):
-        return self._comment.id
+        return self._id
 
     def category(self) -> CPRubricCategory:
         """
@@ -95,50 +224,62 @@ class CPRubricComment:
         """
         :return: text of the comment with trailing whitespace stripped
         """
-        return self._comment.text.rstrip()
+        return self._field("text").rstrip()
 
     def pointDelta(self) -> float:
         """
         :return: point delta for the comment
         """
-        return self._pointDelta
+        pointDelta = self._field("pointDelta")
+        if pointDelta is None:
+            return 0.0
+        return pointDelta
 
     def __str__(self) -> str:
-        if self._pointDelta != 0.0:
-            return f"{self.text()} ({(-self._comment.pointDelta):0.1f})"
+        if self.pointDelta() != 0.0:
+            return f"{self.text()} ({(-self.pointDelta()):0.1f})"
         else:
             return self.text()
 
-class CPRubricCategory:
+class CPRubricCategory(_LazyFields):
+
+    _kind = "rubric_category"
 
-    def __init__(self, category):
+    def __init__(self, category, rubricComments: dict = None):
         """
-        :param category: codepost.io category object
+        :param category: codepost.io category object (or its id or a dictionary of its fields)
+        :param rubricComments: optional dictionary mapping rubric comment ids to their fields so they are not retrieved
         """
-        self._category = category
-        category.retrieve(id=category.id)
-        self._name = category.name
-        self._pointLimit = category.pointLimit
-        self._sortKey = category.sortKey
-        self._comments = [CPRubricComment(c, self) for c in category.rubricComments]
+        super().__init__(category)
+        self._rubricComments = rubricComments
+        self._comments = None
+
+    def ID(self):
+        return self._id
 
     def name(self) -> str:
         """
         :return: the name of the category
         """
-        return self._name
+        return self._field("name")
 
     def comments(self) -> List[CPRubricComment]:
         """
         :return: the list of rubric comment objects for this category
         """
+        if self._comments is None:
+            commentIDs = self._field("rubricComments")
+            known = self._rubricComments if self._rubricComments is not None else {}
+            self._comments = [CPRubricComment(known.get(c, c), self) for c in commentIDs]
+            # retrieve the rubric comments that were not supplied (in parallel if CP.workers > 1)
+            CP.map(lambda c: c._field("text"), self._comments)
         return self._comments
 
     def pointLimit(self) -> float:
         """
         :return: the point limit for the category
         """
-        return self._pointLimit
+        return self._field("pointLimit")
 
     def __lt__(self, other: CPRubricCategory) -> bool:
         """
@@ -146,39 +287,45 @@ class CPRubricCategory:
         :param other: other rubric category to compare
         :return: True if self < other, False otherwise
         """
-        return self._sortKey < other._sortKey
+        return self._field("sortKey") < other._field("sortKey")
 
     def addRubricComment(self, text: str, pointDelta: int, sortKey: int) -> CPRubricComment:
-        c = codepost.rubric_comment.create(category=self._category.id, text=text, pointDelta=pointDelta, sortKey=sortKey)
+        c = codepost.rubric_comment.create(category=self.ID(), text=text, pointDelta=pointDelta, sortKey=sortKey)
+        # the cached copies of this category and the assignment's rubric no longer have every rubric comment
+        CP.invalidate("rubric_category", self.ID())
+        CP.invalidate("rubric", self._field("assignment"))
+        # the created object has all the fields so this does not retrieve it
         rc = CPRubricComment(c, self)
-        self._comments.append(rc)
+        self.comments().append(rc)
         return rc
 
     def hasRubricComment(self, text: str, pointDelta: int) -> bool:
-        for comment in self._comments:
+        for comment in self.comments():
             if comment.text() == text and comment.pointDelta() == pointDelta:
                 return True
         return False
 
     def __str__(self) -> str:
-        return self._name
+        return self.name()
+
+class CPFile(_LazyFields):
 
-class CPFile:
+    _kind = "file"
 
-    def __init__(self, file):
+    def __init__(self, file, version: str = None):
         """
-        :param file: the codepost.io File object
+        :param file: the codepost.io File object (or its id or a dictionary of its fields)
+        :param version: dateEdited of the submission the file belongs to (used to check the cached copy)
         """
-        self._file = file
-        file.retrieve(id=file.id)
+        super().__init__(file, version)
         self._comments = None
-        self._code = None
+        self._lineLengths = None
 
     def contents(self) -> str:
         """
         :return: the content of the file
         """
-        return self._file.code
+        return self._field("code")
 
     def codeLines(self, startLine, endLine) -> str:
         """
@@ -186,29 +333,62 @@ class CPFile:
         :param endLine: ending line number
         :return: a string containing the lines of code from startLine to endLine
         """
-        if self._code is None:
-            self._code = self._file.code.split("\n")
-        return "\n".join(self._code[startLine:endLine+1])
+        code = self._field("code")
+        if self._lineLengths is None:
+            # total length of the lines before each line (without their newlines) so line i starts at
+            # self._lineLengths[i] + i and a range of lines is one slice of the code
+            self._lineLengths = array("q", accumulate(map(len, code.split("\n")), initial=0))
+        # the line numbers in range(startLine, endLine + 1) that exist (the same lines as slicing a list of the lines)
+        lines = range(len(self._lineLengths) - 1)[startLine:endLine+1]
+        if len(lines) == 0:
+            return ""
+        first, last = lines[0], lines[-1]
+        return code[self._lineLengths[first] + first:self._lineLengths[last + 1] + last]
+
+    def releaseCode(self) -> None:
+        """
+        forget the code of the file (and its line offsets) to free the memory once its feedback is written
+        using the code again retrieves the file again (from the cache if it has a current copy)
+        :return: None
+        """
+        if "code" in self._data:
+            del self._data["code"]
+            self._retrieved = False
+        self._lineLengths = None
 
     def fileID(self):
-        return self._file.id
+        return self._id
 
     def delete(self) -> None:
         """delete the file from codepost.io"""
         codepost.file.delete(self.fileID())
+        CP.invalidate("file", self.fileID())
+
+    def updateContents(self, text: str) -> None:
+        """
+        replace the contents of the file on codepost.io keeping the same file (and its comments)
+        :param text: new contents of the file
+        :return: None
+        """
+        codepost.file.update(id=self.fileID(), code=text)
+        CP.invalidate("file", self.fileID())
+        self._data["code"] = text
+        self._lineLengths = None
 
     def filename(self) -> str:
         """
         :return: the name of the file
         """
-        return self._file.name
+        return self._field("name")
 
     def comments(self) -> List[CPComment]:
         """
         :return: list of comments for the file sorted by starting line number
         """
         if self._comments is None:
-            self._comments = [CPComment(c) for c in self._file.comments]
+            self._comments = [CPComment(c, self._version) for c in self._field("comments")]
+            # retrieve the comments (in parallel if CP.workers > 1) before sorting needs their line numbers
+            CP.map(lambda c: c.startLine(), self._comments)
         # sort by start line
         self._comments.sort()
         return self._comments
@@ -247,43 +427,147 @@ class CPSubmission:
         self._assignment = assignment
         self._submission = submission
         self._students = submission.students
-        self._files = [CPFile(f) for f in submission.files]
+        # dateEdited changes whenever a file or comment in the submission changes so it versions the cached copies
+        self._version = _fieldsOf(submission).get("dateEdited")
+        # CPFile objects are made the first time the files are needed
+        self._files = None
 
     def firstStudent(self):
         return self._students[0]
 
+    def submissionID(self):
+        return self._submission.id
+
     def files(self):
+        if self._files is None:
+            self._files = [CPFile(f, self._version) for f in self._submission.files]
+            # retrieve the files (in parallel if CP.workers > 1) since finding a file needs their names
+            CP.map(lambda f: f.filename(), self._files)
         return self._files
 
+    def prefetch(self, fileNamesToProcess: List[str] = None, comments: bool = True) -> None:
+        """
+        retrieve the submission's files and their comments so using them does not make any more requests
+        (used with CP.prefetch to retrieve the next students' submissions while the current one is written)
+        :param fileNamesToProcess: the files to retrieve the comments of (1output.txt is always included) or None for
+                                   all the files
+        :param comments: if False, only retrieve the files
+        :return: None
+        """
+        files = self.files()
+        if not comments:
+            return
+        if fileNamesToProcess is not None:
+            names = set(CPSubmission._withOutputFile(fileNamesToProcess))
+            files = [f for f in files if f.filename() in names]
+        for f in files:
+            f.comments()
+
+    def releaseCode(self) -> None:
+        """
+        forget the code of the submission's files that have been retrieved (see CPFile.releaseCode)
+        :return: None
+        """
+        for f in self._files or []:
+            f.releaseCode()
+
     def fileWithName(self, name):
-        for f in self._files:
+        for f in self.files():
             filename = f.filename()
             if filename == name:
                 return f
         return None
 
-    def uploadFile(self, filename: str, text: str, overwrite: bool =False, renameTo=None) -> None:
+    def isUploaded(self, filename: str, text: str, manifest: CPManifest) -> bool:
+        """
+        check the manifest without retrieving the submission's files (only their ids from the submission are used)
+        :param filename: name of the file on codepost.io
+        :param text: content of the file to upload
+        :param manifest: manifest of the uploaded files
+        :return: True if text was the last upload of the file and the file is still in the submission
+        """
+        fileID = manifest.uploadedFileID(self.firstStudent(), filename, text)
+        return fileID is not None and fileID in set(_objectID(f) for f in self._submission.files)
+
+    def uploadFile(self, filename: str, text: str, overwrite: bool =False, renameTo=None,
+                   manifest: CPManifest = None) -> bool:
         """
         upload file to codepost
         :param filename: name of file in codepost
         :param text: content of the file to upload
-        :param overwrite: if True, overwrite the existing file
+        :param overwrite: if True, overwrite the existing file (its contents are updated in place)
         :param renameTo: optionally rename the file
-        :return: None
+        :param manifest: if not None, skip the upload when the file on codepost.io already has this content
+                         and record what is uploaded
+        :return: True if the file was uploaded, False if it was skipped because it is unchanged
         """
         if renameTo is None:
             renameTo = filename
 
-        # delete existing file if overwrite specified
-        if overwrite:
+        if manifest is not None and self.isUploaded(renameTo, text, manifest):
+            return False
+
+        existingFile = None
+        if overwrite or manifest is not None:
             existingFile = self.fileWithName(renameTo)
-            if existingFile is not None:
-                codepost.file.delete(existingFile.fileID())
 
-        # get file extension
-        extension = renameTo.split('.')[-1]
-        # upload to codepost
-        codepost.file.create(name=renameTo, code=text, extension=extension, submission=self._submission.id)
+        if manifest is not None and existingFile is not None:
+            studentEmail = self.firstStudent()
+            if manifest.isUnchanged(studentEmail, renameTo, text, existingFile.fileID()):
+                return False
+            if existingFile.contents() == text:
+                manifest.record(studentEmail, renameTo, text, existingFile.fileID())
+                return False
+
+        if overwrite and existingFile is not None:
+            # update the existing file in place instead of deleting it so it keeps its id and comments
+            existingFile.updateContents(text)
+            fileID = existingFile.fileID()
+        else:
+            # get file extension
+            extension = renameTo.split('.')[-1]
+            # upload to codepost
+            created = codepost.file.create(name=renameTo, code=text, extension=extension, submission=self._submission.id)
+            fileID = created.id
+            if self._files is not None:
+                # so uploading the file again (such as in watch mode) updates this file instead of adding another
+                self._files.append(CPFile(created, self._version))
+
+        if manifest is not None:
+            manifest.record(self.firstStudent(), renameTo, text, fileID)
+        return True
+
+    @staticmethod
+    def _withOutputFile(fileNamesToProcess: List[str]) -> List[str]:
+        """
+        :param fileNamesToProcess: names of files
+        :return: copy of fileNamesToProcess with 1output.txt added if it is not in it
+        """
+        localFiles = fileNamesToProcess[:]
+        if '1output.txt' not in localFiles:
+            localFiles.append('1output.txt')
+        return localFiles
+
+    def commentFingerprint(self, fileNamesToProcess: List[str], assignment: CPAssignment) -> str:
+        """
+        :param fileNamesToProcess: the files to get the comments for
+        :param assignment: the assignment we are to get the comments for
+        :return: hex digest of a SHA-256 hash of everything rubricCommentsByFile uses (the rubric, the comments' ids,
+                 lines, text and pointDelta, and the code of the files) so it changes when its text would change
+        """
+        parts = []
+        for cat in assignment.rubricCategories():
+            parts.append(["category", cat.name(), cat.pointLimit()])
+            for rubricComment in cat.comments():
+                parts.append(["rubricComment", rubricComment.ID(), rubricComment.text(), rubricComment.pointDelta()])
+        for fileName in CPSubmission._withOutputFile(fileNamesToProcess):
+            f = self.fileWithName(fileName)
+            if f is not None:
+                parts.append(["file", fileName, CPManifest.hashOf(f.contents())])
+                for c in f.comments():
+                    parts.append(["comment", c.ID(), c.startLine(), c.endLine(), c.text(), c.pointDelta(),
+                                  c.rubricCommentID()])
+        return hashlib.sha256(json.dumps(parts).encode("utf8")).hexdigest()
 
     def rubricCommentsByFile(self, fileNamesToProcess: List[str], assignment: CPAssignment) -> str:
         """
@@ -291,33 +575,31 @@ class CPSubmission:
         :param assignment: the assignment we are to get the comments for
         :return: grade, totals per category, and each comment for the files in the submission
         """
+        return "".join(self.rubricFeedback(fileNamesToProcess, assignment))
+
+    def rubricFeedback(self, fileNamesToProcess: List[str], assignment: CPAssignment) -> Iterator[str]:
+        """
+        the text of rubricCommentsByFile in pieces so it can be written to a file without building the whole text
+        :param fileNamesToProcess: the files to get the comments for
+        :param assignment: the assignment we are to get the comments for
+        :return: generator of the grade and totals per category followed by each formatted comment and separator
+        """
         rubricCategories = assignment.rubricCategories()
         deductions = { "Other": 0.0 }
 
-        allComments = []
-        localFiles = fileNamesToProcess[:]
-        if '1output.txt' not in localFiles:
-            localFiles.append('1output.txt')
-        for fileName in localFiles:
+        files = []
+        for fileName in CPSubmission._withOutputFile(fileNamesToProcess):
             f = self.fileWithName(fileName)
-            fileComments = []
             if f is not None:
+                files.append(f)
                 for comment in f.comments():
                     rubricComment = assignment.rubricCommentForComment(comment)
-                    fileComments.append(f.formattedComment(comment, rubricComment))
                     if rubricComment is not None:
                         category = rubricComment.category()
                         deductions[category.name()] = deductions.get(category.name(), 0) + rubricComment.pointDelta()
                     else:
                         deductions["Other"] = deductions.get("Other", 0) + comment.pointDelta()
 
-            if len(fileComments) > 0:
-                sep = 50 * "-" + "\n"
-                allComments.append(sep.join(fileComments))
-
-        sep = 50 * "=" + "\n\n"
-        allComments = sep.join(allComments)
-
         rubricLines = []
         totalPoints = 0.0
 
@@ -352,38 +634,100 @@ class CPSubmission:
         rubricLines.insert(0, f"{totalPoints:0.1f}\n")
         rubricLines = "\n".join(rubricLines)
 
-        sep = f"\n\nFeedback:\n\n{50 * '='}\n\n"
-
-        return f"{rubricLines}{sep}{allComments}"
+        yield f"{rubricLines}\n\nFeedback:\n\n{50 * '='}\n\n"
+
+        # the comments for a file are separated by a line of dashes and the files by a line of equal signs
+        fileSep = 50 * "=" + "\n\n"
+        commentSep = 50 * "-" + "\n"
+        firstFile = True
+        for f in files:
+            firstComment = True
+            for comment in f.comments():
+                if firstComment:
+                    if not firstFile:
+                        yield fileSep
+                    firstFile = False
+                    firstComment = False
+                else:
+                    yield commentSep
+                yield f.formattedComment(comment, assignment.rubricCommentForComment(comment))
 
 class CPAssignment:
 
-    def __init__(self, assignment):
+    def __init__(self, assignment, submissions: list = None):
         """
         :param assignment: codepost.io assignment object
+        :param submissions: the assignment's codepost.io submissions if they were already retrieved
         """
         self._assignment = assignment
-        submissions = self._assignment.list_submissions()
-        self._submissions = [CPSubmission(self._assignment, sub) for sub in submissions]
+        if submissions is None:
+            submissions = self._assignment.list_submissions()
+        # index of student email to the codepost.io submission (which only holds the ids of its files)
+        # the CPSubmission for a student is not made until it is requested
+        self._studentToSubmissionData = {}
+        # index of every other student of a submission (a partner) to the first student of the submission
+        self._partnerToStudent = {}
+        for sub in submissions:
+            self._addSubmissionData(sub)
         self._studentToSubmissions = {}
-        for sub in self._submissions:
-            studentEmail = sub.firstStudent()
-            self._studentToSubmissions[studentEmail] = sub
         self._categories = None
         self._rubricCommentIDs = None
 
+    def students(self) -> List[str]:
+        """
+        :return: list of the email addresses of the first student for each submission
+        """
+        return list(self._studentToSubmissionData.keys())
+
     def submissions(self) -> List[CPSubmission]:
         """
         :return: list of submissions for the assignment
         """
-        return self._submissions
+        return [self.submissionForStudent(studentEmail) for studentEmail in self._studentToSubmissionData]
+
+    def _addSubmissionData(self, sub) -> None:
+        """
+        index a codepost.io submission by its first student and its other students
+        :param sub: codepost.io submission
+        """
+        self._studentToSubmissionData[sub.students[0]] = sub
+        for partner in sub.students[1:]:
+            self._partnerToStudent[partner] = sub.students[0]
 
     def submissionForStudent(self, studentEmail) -> Optional[CPSubmission]:
         """
-        :param studentEmail: email address of submission for student
+        :param studentEmail: email address of any of the students of the submission
         :return: CPSubmission for the student or None if submission for studentEmail does not exist
         """
-        return self._studentToSubmissions.get(studentEmail, None)
+        studentEmail = self._partnerToStudent.get(studentEmail, studentEmail)
+        submission = self._studentToSubmissions.get(studentEmail, None)
+        if submission is None:
+            data = self._studentToSubmissionData.get(studentEmail, None)
+            if data is not None:
+                submission = CPSubmission(self._assignment, data)
+                self._studentToSubmissions[studentEmail] = submission
+        return submission
+
+    def refreshSubmissions(self, student: str = None) -> List[str]:
+        """
+        list the assignment's submissions again and replace the ones that were edited since they were last listed
+        (their dateEdited changes when a file or comment in them changes) so only those are retrieved again
+        :param student: if not None, only list this student's submission
+        :return: list of the first student of each submission that is new or was edited
+        """
+        if student is None:
+            submissions = self._assignment.list_submissions()
+        else:
+            submissions = self._assignment.list_submissions(student=student)
+        changed = []
+        for sub in submissions:
+            studentEmail = sub.students[0]
+            old = self._studentToSubmissionData.get(studentEmail, None)
+            if old is None or _fieldsOf(old).get("dateEdited") != _fieldsOf(sub).get("dateEdited"):
+                changed.append(studentEmail)
+                self._addSubmissionData(sub)
+                self._studentToSubmissions.pop(studentEmail, None)
+        return changed
 
     def makeSubmissionForStudent(self, studentEmail) -> CPSubmission:
         """
@@ -392,10 +736,37 @@ class CPAssignment:
         :return: CPSubmission for the student
         """
         submission = codepost.submission.create(assignment=self._assignment.id, students=[studentEmail])
+        self._addSubmissionData(submission)
         submission = CPSubmission(self._assignment, submission)
         self._studentToSubmissions[studentEmail] = submission
         return submission
 
+    def reconcileStudents(self, studentEmails: Iterable[str]) -> dict:
+        """
+        compare the students that have local directories with the students in the assignment's submissions in one
+        pass and create the missing submissions up front (in parallel if CP.workers > 1)
+        :param studentEmails: email addresses of the students that have local directories
+        :return: dictionary with the sorted lists of the students without a submission ("localOnly", whose submissions
+                 are created) and the first student of the submissions without any local student ("remoteOnly") and
+                 a dictionary of student to error message for the submissions that could not be created ("failed")
+        """
+        local = set(studentEmails)
+        # every student of a submission (not just the first) so partners are not given another submission
+        localOnly = sorted(student for student in local
+                           if student not in self._studentToSubmissionData and student not in self._partnerToStudent)
+        remoteOnly = sorted(student for student, sub in self._studentToSubmissionData.items()
+                            if local.isdisjoint(sub.students))
+
+        def make(studentEmail):
+            try:
+                self.makeSubmissionForStudent(studentEmail)
+                return None
+            except codepost.errors.APIError as e:
+                return str(e)
+
+        failed = {student: error for student, error in zip(localOnly, CP.map(make, localOnly)) if error is not None}
+        return {"localOnly": localOnly, "remoteOnly": remoteOnly, "failed": failed}
+
     def rubricCategories(self) -> List[CPRubricCategory]:
         """
         :return: list of the rubric categories for the assignment
@@ -409,8 +780,25 @@ class CPAssignment:
         load the rubric categories for the assignment
         :return: None
         """
-        categories = self._assignment.rubricCategories
-        self._categories = [CPRubricCategory(c) for c in categories]
+        assignmentID = self._assignment.id
+        rubric = None
+        version = self._rubricVersion()
+        if CP.cache is not None and not CP.refresh:
+            rubric = CP.cache.get("rubric", assignmentID, version, maxAge=CP.rubricMaxAge)
+        if rubric is None:
+            rubric = self._retrieveRubric()
+            if CP.cache is not None:
+                CP.cache.put("rubric", assignmentID, rubric, version)
+        self._setRubric(rubric)
+
+    def _setRubric(self, rubric: dict) -> None:
+        """
+        make the rubric categories and comments for the assignment
+        :param rubric: dictionary with the lists of rubricCategories and rubricComments fields
+        :return: None
+        """
+        rubricComments = {c["id"]: c for c in rubric["rubricComments"]}
+        self._categories = [CPRubricCategory(c, rubricComments) for c in rubric["rubricCategories"]]
         self._categories.sort()
 
         self._rubricCommentIDs = {}
@@ -418,6 +806,37 @@ class CPAssignment:
             for comment in cat.comments():
                 self._rubricCommentIDs[comment.ID()] = comment
 
+    def _rubricVersion(self) -> str:
+        """
+        :return: version for the cached copy of the rubric (the rubric category ids and assignment modification time)
+        """
+        fields = _fieldsOf(self._assignment)
+        categoryIDs = [_objectID(c) for c in fields.get("rubricCategories", [])]
+        return f"{sorted(categoryIDs)} {fields.get('modified')}"
+
+    def _retrieveRubric(self) -> dict:
+        """
+        retrieve the whole rubric with the assignment's rubric endpoint, or if that fails, by retrieving the
+        categories and then all of their rubric comments (in parallel when CP.workers > 1)
+        :return: dictionary with the lists of rubricCategories and rubricComments fields
+        """
+        try:
+            response = codepost.api_requestor.STATIC_REQUESTOR._request(
+                endpoint=f"/assignments/{self._assignment.id}/rubric/", method="GET")
+            rubric = response.json
+            if isinstance(rubric, dict) and "rubricCategories" in rubric and "rubricComments" in rubric:
+                return {"rubricCategories": rubric["rubricCategories"], "rubricComments": rubric["rubricComments"]}
+        except codepost.errors.APIError:
+            pass
+
+        # retrieve each object instead of using _retrieveFields since the cached rubric is the only copy that is kept
+        # (cached categories and comments would not expire with it so it would be rebuilt from stale copies)
+        categoryIDs = [_objectID(c) for c in _fieldsOf(self._assignment).get("rubricCategories", [])]
+        categories = CP.map(lambda c: dict(codepost.rubric_category.retrieve(id=c)._data), categoryIDs)
+        commentIDs = [_objectID(c) for category in categories for c in category["rubricComments"]]
+        comments = CP.map(lambda c: dict(codepost.rubric_comment.retrieve(id=c)._data), commentIDs)
+        return {"rubricCategories": categories, "rubricComments": comments}
+
     def categoryNamed(self, name: str) -> Optional[CPRubricCategory]:
         """
         rubric category with the specified name for the assignment
@@ -442,15 +861,45 @@ class CPAssignment:
 
     def addRubricCategory(self, name: str, pointLimit: int, sortKey: int, helpText: str = "") -> CPRubricCategory:
         rc = codepost.rubric_category.create(name=name, assignment=self._assignment.id, pointLimit=pointLimit, sortKey=sortKey, helpText=helpText)
+        CP.invalidate("rubric", self._assignment.id)
         return CPRubricCategory(rc)
 
 class CPCourse:
 
-    def __init__(self, course):
+    def __init__(self, course, name: str = None, period: str = None):
         """
-        :param course: the codepost.io course object
+        :param course: the codepost.io course object or its id (the course is then retrieved the first time it is
+                       needed and checked against name and period)
+        :param name: name of the course
+        :param period: period of the course
         """
-        self._course = course
+        if isinstance(course, int):
+            self._courseID = course
+            self._courseObject = None
+        else:
+            self._courseID = course.id
+            self._courseObject = course
+        self._name = name
+        self._period = period
+        # codepost.io assignment objects by name once they are all retrieved
+        self._assignments = None
+
+    @property
+    def _course(self):
+        """the codepost.io course object (retrieved the first time it is used if the course was made with its id)"""
+        if self._courseObject is None:
+            course = None
+            try:
+                course = codepost.course.retrieve(id=self._courseID)
+            except codepost.errors.APIError:
+                pass
+            if course is None or course.name != self._name or \
+                    (self._period is not None and course.period != self._period):
+                # the stored id is out of date so find the course by its name again
+                course = CP._findCourse(self._name, self._period)
+                self._courseID = course.id
+            self._courseObject = course
+        return self._courseObject
 
     def makeAssignment(self, name: str, points: int = 100) -> CPAssignment:
         """
@@ -467,27 +916,275 @@ class CPCourse:
                                                     liveFeedbackMode = False)
         return CPAssignment(assignment)
 
-    def assignment(self, name: str) -> CPAssignment:
+    def assignment(self, name: str, student: str = None) -> CPAssignment:
         """
+        the id the name resolved to is stored in CP.cache so the next time the assignment is retrieved directly
+        (checking it still has the name) instead of searching the course's assignments for it
         :param name: name of the assignment
+        :param student: if not None, only retrieve the submission for this student's email address
         :return: the assignment with specified name
         """
-        return CPAssignment(self._course.assignments.by_name(name))
+        key = f"assignment {self._courseID} {name}"
+        assignment = None
+        if self._assignments is not None:
+            assignment = self._assignments.get(name)
+        if assignment is None and CP.cache is not None and not CP.refresh:
+            assignmentID = CP.cache.getID(key)
+            if assignmentID is not None:
+                try:
+                    assignment = codepost.assignment.retrieve(id=assignmentID)
+                except codepost.errors.APIError:
+                    pass
+                if assignment is not None and (assignment.name, _objectID(assignment.course)) != (name, self._courseID):
+                    assignment = None
+                if assignment is None:
+                    CP.cache.invalidateID(key)
+        if assignment is None:
+            assignment = self._course.assignments.by_name(name)
+            if assignment is not None and CP.cache is not None:
+                # the course's id changes if the stored one was out of date
+                CP.cache.putID(f"assignment {self._courseID} {name}", assignment.id)
+        submissions = None if student is None else assignment.list_submissions(student=student)
+        return CPAssignment(assignment, submissions)
+
+    def assignmentNames(self) -> List[str]:
+        """
+        :return: names of all the assignments in the course in the order codepost.io lists them
+                 (the assignments are retrieved in parallel if CP.workers > 1)
+        """
+        if self._assignments is None:
+            assignmentIDs = [_objectID(a) for a in _fieldsOf(self._course).get("assignments", [])]
+            assignments = CP.map(lambda i: codepost.assignment.retrieve(id=i), assignmentIDs)
+            self._assignments = {a.name: a for a in assignments}
+            if CP.cache is not None:
+                for a in assignments:
+                    CP.cache.putID(f"assignment {self._courseID} {a.name}", a.id)
+        return list(self._assignments)
 
 class CP:
     """class to initialize connection to codepost.io"""
 
     config = None
+    workers = 1
+    cache = None
+    session = None
+    refresh = False
+    # number of seconds a cached copy of an assignment's rubric is used for (edits to existing rubric comments made
+    # on codepost.io are not visible from the assignment so use --refresh to see them sooner)
+    rubricMaxAge = 3600
+    _executor = None
+    _threadInfo = threading.local()
+    _reportsAtExit = set()
 
     @staticmethod
-    def init(apiKey:str = ""):
+    def init(apiKey:str = "", workers: int = 1, cache: bool = True, refresh: bool = False, cachePath: str = None,
+             maxRate: float = None):
         """
         :param apiKey: codepost.io api key or if empty string, uses ~/.codepost-config.yaml
+        :param workers: number of threads used to retrieve files, comments, and rubric comments (1 retrieves serially)
+                        and the number of connections the shared HTTP session keeps open
+        :param cache: if True, keep retrieved codepost.io objects in a local cache
+        :param refresh: if True, ignore the objects already in the cache and retrieve them again
+        :param cachePath: path for the cache database (defaults to ~/.codepost-cache.sqlite3)
+        :param maxRate: if not None, the most requests per second to make to codepost.io (instead of the rate limiter's
+                        default of 100)
         """
         if apiKey == "":
             CP.config = codepost.read_config_file()
         else:
             codepost.configure_api_key(apiKey)
+        if CP.session is None:
+            # every request the codepost module makes goes through one keep-alive session shared by the threads
+            # requests are spaced out by one rate limiter and throttled requests are retried
+            limiter = CPRateLimiter() if maxRate is None else CPRateLimiter(maxRate=maxRate)
+            CP.session = CPSession(workers, limiter)
+            codepost.api_requestor.STATIC_REQUESTOR._client = codepost.http_client.HTTPClient(session=CP.session.session)
+        CP.setWorkers(workers)
+        if not cache:
+            CP.cache = None
+        elif CP.cache is None or str(CP.cache) != (CPCache.defaultPath if cachePath is None else cachePath):
+            # keep the open cache when init is called again in the same process (such as by each subcommand of cp.py)
+            CP.cache = CPCache(cachePath)
+        CP.refresh = refresh
+
+    @staticmethod
+    def connectionStats() -> dict:
+        """
+        :return: dictionary with the number of requests made, connections opened, requests that reused a connection,
+                 and the pool size of the shared session (all zero if CP.init has not been called)
+        """
+        if CP.session is None:
+            return {"requests": 0, "connections": 0, "reused": 0, "poolSize": 0}
+        return CP.session.stats()
+
+    @staticmethod
+    def reportStatsAtExit(table: bool, jsonPath: str = None) -> None:
+        """
+        print and/or save the count and latencies of the codepost.io requests by operation when the script exits
+        :param table: if True, print the statistics as a table
+        :param jsonPath: if not None, path of a file to write the statistics to as JSON
+        """
+        if (table or jsonPath is not None) and (table, jsonPath) not in CP._reportsAtExit:
+            # only report once when several subcommands in one process ask for the same report
+            CP._reportsAtExit.add((table, jsonPath))
+            atexit.register(CP._reportStats, table, jsonPath)
+
+    @staticmethod
+    def _reportStats(table: bool, jsonPath: str) -> None:
+        if CP.session is None:
+            return
+        if table:
+            print()
+            print(CP.session.calls.table())
+            print(f"connections: {CP.session}")
+            print(f"rate limit: {CP.session.limiter}")
+        if jsonPath is not None:
+            text = CP.session.calls.toJSON(script=" ".join(sys.argv), connections=CP.connectionStats(),
+                                           throttled=CP.session.limiter.throttledCount)
+            with open(jsonPath, "w") as f:
+                f.write(text)
+
+    @staticmethod
+    def addOptions(parser, workers: Optional[int] = 1,
+                   workersHelp: str = "number of threads to use for retrieving files and comments from codepost.io"
+                   ) -> None:
+        """
+        add the options every script takes for CP.initFromOptions to an ArgumentParser
+        :param parser: ArgumentParser for the script
+        :param workers: default number of threads for the -w/--workers option or None to not add the option
+        :param workersHelp: help text for the -w/--workers option
+        """
+        if workers is not None:
+            parser.add_argument('-w', '--workers', dest='workers', type=_positiveInt, default=workers,
+                                help=workersHelp)
+        parser.add_argument('--no-cache', dest='noCache', action='store_true',
+                            help='''do not use the local cache of codepost.io objects''')
+        parser.add_argument('--refresh', dest='refresh', action='store_true',
+                            help='''ignore the local cache and download codepost.io objects again''')
+        parser.add_argument('--stats', dest='stats', action='store_true',
+                            help='''print the number and latency of the codepost.io requests by operation at the
+                            end''')
+        parser.add_argument('--stats-json', dest='statsJSON', default=None,
+                            help='''write the number and latency of the codepost.io requests by operation to this JSON
+                            file''')
+
+    @staticmethod
+    def initFromOptions(options) -> None:
+        """
+        call CP.init and CP.reportStatsAtExit with the options added by CP.addOptions
+        :param options: parsed command line options
+        """
+        CP.init(workers=getattr(options, "workers", 1), cache=not options.noCache, refresh=options.refresh)
+        CP.reportStatsAtExit(options.stats, options.statsJSON)
+
+    @staticmethod
+    def addCourseOptions(parser, assignment: bool = True) -> None:
+        """
+        add the --course-prefix and -c/--course-name options (and -a/--assignment-name) for CP.courseAndAssignment
+        :param parser: ArgumentParser for the script
+        :param assignment: if True, also add the -a/--assignment-name option
+        """
+        parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
+                            help='''directory prefix for course names (i.e., if all your codepost.io course names and
+                            local directories start with CS such as CS160 then use the default
+                            ''')
+        parser.add_argument('-c', '--course-name', dest='course', default=None,
+                            help='''name of course, if no name supplied, will try to find directory with coursePrefix
+                            in the current working directory's parent directories
+                            ''')
+        if assignment:
+            parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
+                                help='''name of assignment, if no name supplied will try to find directory with
+                                coursePrefix and use directory after it as the assignment name
+                                ''')
+
+    @staticmethod
+    def courseAndAssignment(options) -> tuple:
+        """
+        :param options: parsed command line options with the options added by CP.addCourseOptions
+        :return: course name and assignment name from the -c and -a options, or for the ones not supplied, the
+                 directory starting with --course-prefix that the current directory is in and the directory after it
+                 (the assignment name is None if the options have no assignment)
+        """
+        course = options.course
+        assignment = getattr(options, "assignment", None)
+        findAssignment = assignment is None and hasattr(options, "assignment")
+        if course is None or findAssignment:
+            info = FileInfo.infoForFilePath(os.getcwd(), options.coursePrefix)
+            if course is None:
+                course = info[0]
+            if findAssignment:
+                assignment = info[1]
+        return course, assignment
+
+    @staticmethod
+    def invalidate(kind: str, objectID: int) -> None:
+        """
+        remove an object from the cache after it is changed or deleted
+        :param kind: name of the codepost module object for the object ("file", "comment", "rubric_category", ...)
+        :param objectID: codepost.io id of the object
+        """
+        if CP.cache is not None:
+            CP.cache.invalidate(kind, objectID)
+
+    @staticmethod
+    def setWorkers(workers: int) -> None:
+        """
+        :param workers: number of threads to use for retrieving codepost.io objects
+        """
+        if CP._executor is not None:
+            CP._executor.shutdown()
+            CP._executor = None
+        CP.workers = max(1, workers)
+        if CP.session is not None:
+            CP.session.resize(CP.workers)
+        if CP.workers > 1:
+            CP._executor = ThreadPoolExecutor(max_workers=CP.workers, initializer=CP._markWorkerThread)
+
+    @staticmethod
+    def _markWorkerThread() -> None:
+        CP._threadInfo.isWorker = True
+
+    @staticmethod
+    def map(func: Callable, items: Iterable) -> list:
+        """
+        apply func to each item using the worker threads if CP.init was called with workers > 1
+        calls made from inside a worker thread run serially so nested calls cannot deadlock the pool
+        :param func: function to call with each item
+        :param items: items to pass to func
+        :return: list of the results in the same order as items
+        """
+        items = list(items)
+        if CP._executor is None or len(items) < 2 or getattr(CP._threadInfo, "isWorker", False):
+            return [func(item) for item in items]
+        return list(CP._executor.map(func, items))
+
+    @staticmethod
+    def prefetch(func: Callable, items: Iterable, ahead: int = None) -> Iterator:
+        """
+        call func on each item in the worker threads, working up to ahead items past the one the caller is using, and
+        yield the items in order once func has finished with them (so a serial loop over submissions that writes
+        files retrieves the next submissions in parallel without keeping every submission in memory)
+        :param func: function to call with each item (such as CPSubmission.prefetch)
+        :param items: items to pass to func
+        :param ahead: most items func is called on before the caller is done with them (defaults to 2 * CP.workers)
+        :return: iterator of the items
+        """
+        items = iter(items)
+        if CP._executor is None or getattr(CP._threadInfo, "isWorker", False):
+            for item in items:
+                func(item)
+                yield item
+            return
+        if ahead is None:
+            ahead = 2 * CP.workers
+        pending = deque((item, CP._executor.submit(func, item)) for item in islice(items, ahead))
+        while len(pending) > 0:
+            item, future = pending.popleft()
+            future.result()
+            for nextItem in islice(items, 1):
+                pending.append((nextItem, CP._executor.submit(func, nextItem)))
+            yield item
 
     @staticmethod
     def period() -> Optional[str]:
@@ -508,8 +1205,24 @@ class CP:
         """
         if period is None:
             period = CP.period()
+        # use the id the course resolved to last time without any requests (it is checked when the course is needed)
+        if CP.cache is not None and not CP.refresh:
+            courseID = CP.cache.getID(f"course {name} {period}")
+            if courseID is not None:
+                return CPCourse(courseID, name, period)
+        return CPCourse(CP._findCourse(name, period), name, period)
+
+    @staticmethod
+    def _findCourse(name: str, period: str):
+        """
+        :param name: name of course to get
+        :param period: period to get the course in
+        :return: the codepost.io course object with the specified name and period (its id is stored in CP.cache)
+        """
         try:
             c = codepost.course.list_available(name=name, period=period)[0]
-            return CPCourse(c)
         except:
             raise ValueError(f"Unable to retrieve course: {name} in period {period}.")
+        if CP.cache is not None:
+            CP.cache.putID(f"course {name} {period}", c.id)
+        return c
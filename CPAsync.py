@@ -0,0 +1,254 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import List, Optional
+
+import codepost
+
+from CPAPI import CP, CPAssignment, CPComment, CPCourse, CPFile, CPRubricCategory, CPSubmission, _fieldsOf, _loaded, \
+    _objectID, _resource
+from CPManifest import CPManifest
+from CPRateLimiter import CPRateLimiter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# ----------------------------------------------------------------------
+
+class CPAsync:
+    """
+    asyncio client for codepost.io that makes the same wrapper objects as the CPAPI classes
+    requests share one pool of HTTP connections and at most concurrency requests are made at the same time
+    objects are read from and stored in CP.cache the same way the CPAPI classes do, so call CP.init first
+    """
+
+    def __init__(self, concurrency: int = 8):
+        """
+        :param concurrency: maximum number of requests to codepost.io in progress at the same time
+        """
+        if httpx is None:
+            raise ImportError("the asyncio backend requires the httpx module (pip install httpx)")
+        requestor = codepost.api_requestor.STATIC_REQUESTOR
+        self._concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._client = httpx.AsyncClient(base_url=requestor._base_url,
+                                         headers={"Authorization": f"Token {requestor.api_key}"},
+                                         limits=httpx.Limits(max_connections=self._concurrency,
+                                                             max_keepalive_connections=self._concurrency),
+                                         timeout=60.0)
+        self.requests = 0
+
+    async def __aenter__(self) -> CPAsync:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """close the HTTP connections"""
+        await self._client.aclose()
+
+    async def _request(self, method: str, endpoint: str, **kwargs):
+        """
+        :param method: HTTP method
+        :param endpoint: path of the codepost.io endpoint
+        :param kwargs: passed to httpx (such as json for the body of the request)
+        :return: decoded JSON response (None if the response is empty)
+        """
+        # wait for the same rate limiter as the synchronous requests and retry throttled requests
+        limiter = CP.session.limiter if CP.session is not None else None
+        attempt = 0
+        while True:
+            if limiter is not None:
+                wait = limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            async with self._semaphore:
+                start = time.perf_counter()
+                response = await self._client.request(method, endpoint, **kwargs)
+                if CP.session is not None:
+                    CP.session.calls.record(method, endpoint, time.perf_counter() - start, response.status_code)
+            self.requests += 1
+            if limiter is None:
+                break
+            if response.status_code not in CPRateLimiter.retryStatusCodes:
+                limiter.succeeded()
+                break
+            if attempt >= limiter.maxRetries or \
+                    not CPRateLimiter.shouldRetry(method, response.status_code, response.headers.get("Retry-After")):
+                break
+            retryAfter = CPRateLimiter.retryAfter(response.headers.get("Retry-After"))
+            await asyncio.sleep(limiter.throttled(attempt, retryAfter))
+            attempt += 1
+
+        if response.status_code >= 400:
+            codepost.errors.handle_api_error(status_code=response.status_code, response=response)
+        if len(response.content) == 0:
+            return None
+        return response.json()
+
+    async def _retrieveFields(self, kind: str, objectID: int, version: str = None) -> dict:
+        """
+        :param kind: name of the codepost module object for the object ("file", "comment", ...)
+        :param objectID: codepost.io id of the object
+        :param version: version a cached copy must have to be used
+        :return: dictionary of the fields of the object (from CP.cache if it has a current copy)
+        """
+        if CP.cache is not None and not CP.refresh:
+            fields = CP.cache.get(kind, objectID, version)
+            if fields is not None:
+                return fields
+        fields = await self._request("GET", getattr(codepost, kind).instance_endpoint_by_id(id=objectID))
+        if CP.cache is not None:
+            CP.cache.put(kind, objectID, fields, version)
+        return fields
+
+    async def assignment(self, course: CPCourse, name: str) -> Optional[CPAssignment]:
+        """
+        :param course: course the assignment is in
+        :param name: name of the assignment
+        :return: the assignment with specified name or None if the course does not have it
+        """
+        assignmentIDs = [_objectID(a) for a in _fieldsOf(course._course).get("assignments", [])]
+        assignments = await asyncio.gather(
+            *(self._request("GET", codepost.assignment.instance_endpoint_by_id(id=i)) for i in assignmentIDs))
+        for fields in assignments:
+            if fields["name"] == name:
+                endpoint = f"{codepost.assignment.instance_endpoint_by_id(id=fields['id'])}submissions"
+                submissions = await self._request("GET", endpoint)
+                return CPAssignment(_resource("assignment", fields),
+                                    [_resource("submission", s) for s in submissions])
+        return None
+
+    async def submissions(self, assignment: CPAssignment) -> List[CPSubmission]:
+        """
+        :param assignment: assignment to get the submissions for
+        :return: list of submissions for the assignment with the files of every submission retrieved
+        """
+        submissions = assignment.submissions()
+        await asyncio.gather(*(self.files(s) for s in submissions))
+        return submissions
+
+    async def files(self, submission: CPSubmission) -> List[CPFile]:
+        """
+        :param submission: submission to get the files for
+        :return: list of the files in the submission (also used by the submission's files method)
+        """
+        if submission._files is None:
+            version = submission._version
+            fileIDs = [_objectID(f) for f in submission._submission.files]
+            files = await asyncio.gather(*(self._retrieveFields("file", i, version) for i in fileIDs))
+            submission._files = [_loaded(CPFile(f, version)) for f in files]
+        return submission._files
+
+    async def fileWithName(self, submission: CPSubmission, name: str) -> Optional[CPFile]:
+        """
+        :param submission: submission to find the file in
+        :param name: name of the file
+        :return: the file with the name or None if the submission does not have it
+        """
+        for f in await self.files(submission):
+            if f.filename() == name:
+                return f
+        return None
+
+    async def comments(self, file: CPFile) -> List[CPComment]:
+        """
+        :param file: file to get the comments for
+        :return: list of comments for the file sorted by starting line number (also used by the file's comments method)
+        """
+        if file._comments is None:
+            if "comments" not in file._data:
+                file._data.update(await self._retrieveFields("file", file.fileID(), file._version))
+                file._retrieved = True
+            comments = await asyncio.gather(
+                *(self._retrieveFields("comment", _objectID(c), file._version) for c in file._data["comments"]))
+            file._comments = [_loaded(CPComment(c, file._version)) for c in comments]
+        file._comments.sort()
+        return file._comments
+
+    async def rubricCategories(self, assignment: CPAssignment) -> List[CPRubricCategory]:
+        """
+        :param assignment: assignment to get the rubric for
+        :return: list of the rubric categories for the assignment (also used by the assignment's methods)
+        """
+        if assignment._categories is None:
+            assignmentID = assignment._assignment.id
+            version = assignment._rubricVersion()
+            rubric = None
+            if CP.cache is not None and not CP.refresh:
+                rubric = CP.cache.get("rubric", assignmentID, version, maxAge=CP.rubricMaxAge)
+            if rubric is None:
+                rubric = await self._retrieveRubric(assignment)
+                if CP.cache is not None:
+                    CP.cache.put("rubric", assignmentID, rubric, version)
+            assignment._setRubric(rubric)
+        return assignment._categories
+
+    async def _retrieveRubric(self, assignment: CPAssignment) -> dict:
+        """
+        retrieve the whole rubric with the assignment's rubric endpoint, or if that fails, by retrieving the
+        categories and then all of their rubric comments
+        :return: dictionary with the lists of rubricCategories and rubricComments fields
+        """
+        assignmentID = assignment._assignment.id
+        try:
+            rubric = await self._request("GET", f"{codepost.assignment.instance_endpoint_by_id(id=assignmentID)}rubric/")
+            if isinstance(rubric, dict) and "rubricCategories" in rubric and "rubricComments" in rubric:
+                return {"rubricCategories": rubric["rubricCategories"], "rubricComments": rubric["rubricComments"]}
+        except codepost.errors.APIError:
+            pass
+
+        categoryIDs = [_objectID(c) for c in _fieldsOf(assignment._assignment).get("rubricCategories", [])]
+        categories = await asyncio.gather(*(self._retrieveFields("rubric_category", i) for i in categoryIDs))
+        commentIDs = [c for category in categories for c in category["rubricComments"]]
+        comments = await asyncio.gather(*(self._retrieveFields("rubric_comment", i) for i in commentIDs))
+        return {"rubricCategories": list(categories), "rubricComments": list(comments)}
+
+    async def uploadFile(self, submission: CPSubmission, filename: str, text: str, overwrite: bool = False,
+                         renameTo=None, manifest: CPManifest = None) -> bool:
+        """
+        upload file to codepost (the same as CPSubmission.uploadFile)
+        :param submission: submission to upload the file to
+        :param filename: name of file in codepost
+        :param text: content of the file to upload
+        :param overwrite: if True, overwrite the existing file (its contents are updated in place)
+        :param renameTo: optionally rename the file
+        :param manifest: if not None, skip the upload when the file on codepost.io already has this content
+                         and record what is uploaded
+        :return: True if the file was uploaded, False if it was skipped because it is unchanged
+        """
+        if renameTo is None:
+            renameTo = filename
+
+        existingFile = None
+        if overwrite or manifest is not None:
+            existingFile = await self.fileWithName(submission, renameTo)
+
+        if manifest is not None and existingFile is not None:
+            studentEmail = submission.firstStudent()
+            if manifest.isUnchanged(studentEmail, renameTo, text, existingFile.fileID()):
+                return False
+            if existingFile.contents() == text:
+                manifest.record(studentEmail, renameTo, text, existingFile.fileID())
+                return False
+
+        if overwrite and existingFile is not None:
+            # update the existing file in place instead of deleting it so it keeps its id and comments
+            fileID = existingFile.fileID()
+            await self._request("PATCH", codepost.file.instance_endpoint_by_id(id=fileID), json={"code": text})
+            CP.invalidate("file", fileID)
+            existingFile._data["code"] = text
+            existingFile._lineLengths = None
+        else:
+            extension = renameTo.split('.')[-1]
+            created = await self._request("POST", codepost.file.class_endpoint,
+                                          json={"name": renameTo, "code": text, "extension": extension,
+                                                "submission": submission.submissionID()})
+            fileID = created["id"]
+
+        if manifest is not None:
+            manifest.record(submission.firstStudent(), renameTo, text, fileID)
+        return True
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# ----------------------------------------------------------------------
+
+class CPCache:
+    """SQLite backed cache of the fields of codepost.io objects keyed by the kind of object and its id"""
+
+    defaultPath = os.path.expanduser("~/.codepost-cache.sqlite3")
+
+    def __init__(self, path: str = None, ttl: float = 7 * 24 * 3600, maxBytes: int = 256 * 1024 * 1024):
+        """
+        :param path: path of the SQLite database file (defaults to ~/.codepost-cache.sqlite3)
+        :param ttl: number of seconds an entry is valid for after it is stored
+        :param maxBytes: approximate maximum size of the stored data; least recently used entries are evicted past this
+        """
+        if path is None:
+            path = CPCache.defaultPath
+        self._path = path
+        self._ttl = ttl
+        self._maxBytes = maxBytes
+        self._lock = threading.Lock()
+        self._putsSinceEviction = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS objects (
+                                kind TEXT NOT NULL,
+                                id INTEGER NOT NULL,
+                                version TEXT,
+                                stored REAL NOT NULL,
+                                accessed REAL NOT NULL,
+                                size INTEGER NOT NULL,
+                                data TEXT NOT NULL,
+                                PRIMARY KEY (kind, id))""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS objectsAccessed ON objects (accessed)")
+        # ids that names resolved to (such as a course name and period to the course's id)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS ids (
+                                name TEXT NOT NULL PRIMARY KEY,
+                                id INTEGER NOT NULL,
+                                stored REAL NOT NULL)""")
+        self.evict()
+
+    def __str__(self) -> str:
+        return self._path
+
+    def get(self, kind: str, objectID: int, version: str = None, maxAge: float = None) -> Optional[dict]:
+        """
+        :param kind: kind of codepost.io object (such as "file" or "comment")
+        :param objectID: codepost.io id of the object
+        :param version: if not None, the entry is only used if it was stored with the same version
+        :param maxAge: if not None, the entry is only used if it was stored less than maxAge seconds ago
+        :return: dictionary of the fields of the object or None if not cached, expired, or a different version
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT version, stored, data FROM objects WHERE kind = ? AND id = ?",
+                                   (kind, objectID)).fetchone()
+            if row is None:
+                return None
+            storedVersion, stored, data = row
+            if maxAge is not None and now - stored > maxAge:
+                return None
+            if now - stored > self._ttl or (version is not None and version != storedVersion):
+                self._db.execute("DELETE FROM objects WHERE kind = ? AND id = ?", (kind, objectID))
+                return None
+            self._db.execute("UPDATE objects SET accessed = ? WHERE kind = ? AND id = ?", (now, kind, objectID))
+        return json.loads(data)
+
+    def put(self, kind: str, objectID: int, fields: dict, version: str = None) -> None:
+        """
+        store the fields of a codepost.io object
+        :param kind: kind of codepost.io object (such as "file" or "comment")
+        :param objectID: codepost.io id of the object
+        :param fields: dictionary of the fields of the object (must be JSON serializable)
+        :param version: version of the object (such as the dateEdited of the submission it belongs to)
+        :return: None
+        """
+        now = time.time()
+        data = json.dumps(fields)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (kind, objectID, version, now, now, len(data), data))
+            self._putsSinceEviction += 1
+            evict = self._putsSinceEviction >= 500
+        if evict:
+            self.evict()
+
+    def invalidate(self, kind: str, objectID: int) -> None:
+        """
+        remove an object from the cache (used when the object is changed or deleted on codepost.io)
+        :param kind: kind of codepost.io object
+        :param objectID: codepost.io id of the object
+        :return: None
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM objects WHERE kind = ? AND id = ?", (kind, objectID))
+
+    def getID(self, name: str) -> Optional[int]:
+        """
+        the id is not checked so check that the object it retrieves still has the name
+        :param name: key for the name that was resolved (such as "course CS161 Fall 2026")
+        :return: the codepost.io id stored for the name or None if there is not one
+        """
+        with self._lock:
+            row = self._db.execute("SELECT id FROM ids WHERE name = ?", (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def putID(self, name: str, objectID: int) -> None:
+        """
+        store the codepost.io id a name resolved to
+        :param name: key for the name that was resolved (such as "course CS161 Fall 2026")
+        :param objectID: codepost.io id of the object with the name
+        :return: None
+        """
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO ids VALUES (?, ?, ?)", (name, objectID, time.time()))
+
+    def invalidateID(self, name: str) -> None:
+        """
+        remove the id stored for a name (used when the object no longer has the name)
+        :param name: key for the name that was resolved
+        :return: None
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM ids WHERE name = ?", (name,))
+
+    def clear(self) -> None:
+        """remove every entry from the cache"""
+        with self._lock:
+            self._db.execute("DELETE FROM objects")
+            self._db.execute("DELETE FROM ids")
+
+    def evict(self) -> None:
+        """remove expired entries and then least recently used entries until the cache is under its size limit"""
+        with self._lock:
+            self._putsSinceEviction = 0
+            self._db.execute("DELETE FROM objects WHERE stored < ?", (time.time() - self._ttl,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self._maxBytes:
+                return
+            rows = self._db.execute("SELECT kind, id, size FROM objects ORDER BY accessed").fetchall()
+            for kind, objectID, size in rows:
+                if total <= self._maxBytes:
+                    break
+                self._db.execute("DELETE FROM objects WHERE kind = ? AND id = ?", (kind, objectID))
+                total -= size
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, Optional
+
+from FileUtils import FileInfo
+
+# ----------------------------------------------------------------------
+
+class CPFeedback:
+    """
+    the codepost.io feedback cpDownloadRubricAndComments.py writes at the start of a grade file
+    the feedback ends with a marker line holding the fingerprint of the comments it was made from, followed by a blank
+    line and the original text of the grade file (the output of the tests)
+    """
+
+    endMarker = "##### end of codepost.io feedback"
+
+    @staticmethod
+    def endLine(fingerprint: str) -> str:
+        """
+        :param fingerprint: fingerprint of the comments the feedback was made from
+        :return: the lines to write between the feedback and the original text of the grade file
+        """
+        return f"\n{CPFeedback.endMarker} {fingerprint} #####\n\n"
+
+    @staticmethod
+    def fingerprint(gradeFileInfo: FileInfo) -> Optional[str]:
+        """
+        :param gradeFileInfo: grade file
+        :return: the fingerprint of the feedback previously written to the grade file (None if it has none)
+        """
+        for line in gradeFileInfo.lines():
+            if line.startswith(CPFeedback.endMarker):
+                return line[len(CPFeedback.endMarker):].strip(" #\r\n")
+        return None
+
+    @staticmethod
+    def linesWithoutFeedback(lines: Iterable[str], hasFeedback: bool) -> Iterator[str]:
+        """
+        :param lines: lines of a grade file including their newlines
+        :param hasFeedback: True if feedback was previously written to the grade file
+        :return: generator of the lines of the grade file after the feedback previously written to it
+        """
+        lines = iter(lines)
+        if hasFeedback:
+            for line in lines:
+                if line.startswith(CPFeedback.endMarker):
+                    break
+            # remove the blank line that separated the feedback from the original text
+            line = next(lines, "")
+            if line != "\n":
+                yield line
+        yield from lines
+
+    @staticmethod
+    def withoutFeedback(text: str) -> str:
+        """
+        :param text: contents of a grade file
+        :return: the contents after the feedback written to it (all of text if it has no feedback)
+        """
+        lines = text.splitlines(keepends=True)
+        hasFeedback = any(line.startswith(CPFeedback.endMarker) for line in lines)
+        return "".join(CPFeedback.linesWithoutFeedback(lines, hasFeedback))
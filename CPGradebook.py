@@ -0,0 +1,169 @@
+from __future__ import annotations
+import csv
+from typing import List
+
+from CPAPI import CP, CPAssignment, CPSubmission
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# ----------------------------------------------------------------------
+
+class CPGradebook:
+    """
+    grades for every submission of an assignment computed at once from a students x rubric categories matrix of the
+    points deducted, using the same rules as CPSubmission.rubricCommentsByFile:
+    a category with a point limit gets pointLimit - min(deducted, pointLimit), the Bonus and Deductions categories
+    and categories without a point limit subtract what was deducted, and comments without a rubric comment are
+    subtracted as Other
+    """
+
+    def __init__(self, assignment: CPAssignment, fileNamesToProcess: List[str] = None):
+        """
+        :param assignment: assignment to grade (its submissions' comments are retrieved in parallel if CP.workers > 1)
+        :param fileNamesToProcess: the files to use the comments from (1output.txt is always used) or None to use the
+                                   comments on all the files in each submission
+        """
+        if numpy is None:
+            raise ImportError("the gradebook requires the numpy module (pip install numpy)")
+        categories = assignment.rubricCategories()
+        self._categoryNames = [c.name() for c in categories]
+        self._pointLimits = numpy.array([numpy.nan if c.pointLimit() is None else c.pointLimit() for c in categories],
+                                        dtype=float)
+        # column of each rubric comment's category; the last column is Other
+        columns = {rc.ID(): i for i, c in enumerate(categories) for rc in c.comments()}
+        otherColumn = len(categories)
+
+        def deductionsFor(submission: CPSubmission) -> list:
+            if fileNamesToProcess is None:
+                files = submission.files()
+            else:
+                files = [submission.fileWithName(name) for name in CPSubmission._withOutputFile(fileNamesToProcess)]
+            deductions = []
+            for f in files:
+                if f is None:
+                    continue
+                for comment in f.comments():
+                    rubricComment = assignment.rubricCommentForComment(comment)
+                    if rubricComment is not None:
+                        deductions.append((columns[rubricComment.ID()], rubricComment.pointDelta()))
+                    else:
+                        deductions.append((otherColumn, comment.pointDelta()))
+            # only the comments are needed so do not keep every student's code in memory
+            submission.releaseCode()
+            return deductions
+
+        submissions = sorted(assignment.submissions(), key=lambda s: s.firstStudent())
+        self._students = [s.firstStudent() for s in submissions]
+        rows, cols, points = [], [], []
+        for row, deductions in enumerate(CP.map(deductionsFor, submissions)):
+            for col, pointDelta in deductions:
+                rows.append(row)
+                cols.append(col)
+                points.append(pointDelta)
+
+        self._deductions = numpy.zeros((len(submissions), otherColumn + 1))
+        numpy.add.at(self._deductions, (numpy.array(rows, dtype=int), numpy.array(cols, dtype=int)),
+                     numpy.array(points, dtype=float))
+        self._scores = None
+
+    def students(self) -> List[str]:
+        """
+        :return: the first student of each submission in the order of the rows
+        """
+        return self._students
+
+    def columnNames(self) -> List[str]:
+        """
+        :return: names of the columns of scores (the rubric categories in order followed by Other)
+        """
+        return self._categoryNames + ["Other"]
+
+    def deductions(self):
+        """
+        :return: students x (rubric categories + Other) array of the total pointDelta of the comments in each category
+        """
+        return self._deductions
+
+    def scores(self):
+        """
+        :return: students x (rubric categories + Other) array of the points each category adds to the grade (negative
+                 for Deductions, Other, and categories without a point limit)
+        """
+        if self._scores is None:
+            deducted = self._deductions[:, :-1]
+            limits = self._pointLimits
+            subtracted = numpy.isnan(limits) | numpy.isin(self._categoryNames, ["Bonus", "Deductions"])
+            limited = limits - numpy.minimum(deducted, limits)
+            categoryScores = numpy.where(subtracted, -deducted, limited)
+            self._scores = numpy.hstack([categoryScores, -self._deductions[:, -1:]])
+        return self._scores
+
+    def totals(self):
+        """
+        :return: array of the grade of each student (the first line of the rubric file)
+        """
+        return self.scores().sum(axis=1)
+
+    def statistics(self) -> dict:
+        """
+        :return: dictionary of column name (and "Total") to a dictionary with the mean, standard deviation, minimum,
+                 median, and maximum of its scores and the number of students that lost (or gained) points in it
+        """
+        scores = self.scores()
+        columns = numpy.hstack([scores, self.totals()[:, None]])
+        names = self.columnNames() + ["Total"]
+        statistics = {}
+        if len(self._students) == 0:
+            return statistics
+        means = columns.mean(axis=0)
+        deviations = columns.std(axis=0)
+        minimums = columns.min(axis=0)
+        medians = numpy.median(columns, axis=0)
+        maximums = columns.max(axis=0)
+        # the number of students with comments in each column and every student for the total
+        students = numpy.append(numpy.count_nonzero(self._deductions, axis=0), len(self._students))
+        for i, name in enumerate(names):
+            statistics[name] = {"mean": round(float(means[i]), 2), "std": round(float(deviations[i]), 2),
+                                "min": float(minimums[i]), "median": float(medians[i]), "max": float(maximums[i]),
+                                "students": int(students[i])}
+        return statistics
+
+    def statisticsTable(self) -> str:
+        """
+        :return: statistics as a table with a line per rubric category followed by Other and the total
+        """
+        statistics = self.statistics()
+        width = max([len("category")] + [len(name) for name in statistics])
+        lines = [f"{'category':{width}s} {'mean':>7s} {'std':>7s} {'min':>7s} {'median':>7s} {'max':>7s} "
+                 f"{'students':>8s}"]
+        for name, s in statistics.items():
+            lines.append(f"{name:{width}s} {s['mean']:7.2f} {s['std']:7.2f} {s['min']:7.1f} {s['median']:7.1f} "
+                         f"{s['max']:7.1f} {s['students']:8d}")
+        return "\n".join(lines)
+
+    def writeCSV(self, path: str) -> None:
+        """
+        write the gradebook as a CSV file with a row per student of the total and the score in each category
+        :param path: path of the CSV file
+        """
+        scores = self.scores()
+        totals = self.totals()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["student", "total"] + self.columnNames())
+            for i, student in enumerate(self._students):
+                writer.writerow([student, f"{totals[i]:0.1f}"] + [f"{s:0.1f}" for s in scores[i]])
+
+    def writeStatisticsCSV(self, path: str) -> None:
+        """
+        write the statistics as a CSV file with a row per rubric category followed by Other and the total
+        :param path: path of the CSV file
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["category", "mean", "std", "min", "median", "max", "students"])
+            for name, s in self.statistics().items():
+                writer.writerow([name, s["mean"], s["std"], s["min"], s["median"], s["max"], s["students"]])
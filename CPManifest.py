@@ -0,0 +1,97 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+
+# ----------------------------------------------------------------------
+
+class CPManifest:
+    """
+    local record of the files uploaded for an assignment
+    for each (student, filename) it keeps the SHA-256 hash of the contents uploaded and the codepost.io file id
+    so the upload scripts can skip files that have not changed since they were uploaded
+    """
+
+    filename = ".codepost-manifest.json"
+
+    @staticmethod
+    def hashOf(text: str) -> str:
+        """
+        :param text: contents of a file
+        :return: hex digest of the SHA-256 hash of text
+        """
+        return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+    def __init__(self, dirPath: str, assignment: str):
+        """
+        :param dirPath: assignment directory (the directory containing the student directories)
+        :param assignment: name of the assignment
+        """
+        self._path = os.path.join(dirPath, CPManifest.filename)
+        self._assignment = assignment
+        self._lock = threading.Lock()
+        self._changed = False
+        self._manifests = {}
+        if os.path.exists(self._path):
+            try:
+                with open(self._path) as f:
+                    self._manifests = json.load(f)
+            except (OSError, ValueError):
+                print(f"error reading {self._path}; files will be compared with codepost.io")
+        self._entries = self._manifests.setdefault(assignment, {})
+
+    def __str__(self) -> str:
+        return self._path
+
+    def isUnchanged(self, studentEmail: str, filename: str, text: str, fileID) -> bool:
+        """
+        :param studentEmail: email address of the student
+        :param filename: name of the file on codepost.io
+        :param text: contents to upload
+        :param fileID: codepost.io id of the existing file with that name
+        :return: True if text is what was last uploaded as that file, False otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(f"{studentEmail}/{filename}")
+        return entry is not None and entry["fileID"] == fileID and entry["sha256"] == CPManifest.hashOf(text)
+
+    def uploadedFileID(self, studentEmail: str, filename: str, text: str):
+        """
+        :param studentEmail: email address of the student
+        :param filename: name of the file on codepost.io
+        :param text: contents to upload
+        :return: codepost.io id of the file text was last uploaded as (None if text is not what was last uploaded)
+        """
+        with self._lock:
+            entry = self._entries.get(f"{studentEmail}/{filename}")
+        if entry is None or entry["sha256"] != CPManifest.hashOf(text):
+            return None
+        return entry["fileID"]
+
+    def record(self, studentEmail: str, filename: str, text: str, fileID) -> None:
+        """
+        record that text is the contents of the file on codepost.io
+        :param studentEmail: email address of the student
+        :param filename: name of the file on codepost.io
+        :param text: contents of the file
+        :param fileID: codepost.io id of the file
+        :return: None
+        """
+        entry = {"sha256": CPManifest.hashOf(text), "fileID": fileID}
+        with self._lock:
+            key = f"{studentEmail}/{filename}"
+            if self._entries.get(key) != entry:
+                self._entries[key] = entry
+                self._changed = True
+
+    def save(self) -> None:
+        """write the manifest if it changed"""
+        with self._lock:
+            if not self._changed:
+                return
+            tempPath = f"{self._path}.tmp"
+            with open(tempPath, "w") as f:
+                json.dump(self._manifests, f, indent=1, sort_keys=True)
+            os.replace(tempPath, self._path)
+            self._changed = False
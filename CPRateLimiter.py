@@ -0,0 +1,143 @@
+from __future__ import annotations
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from typing import Optional
+
+# ----------------------------------------------------------------------
+
+class CPRateLimiter:
+    """
+    token bucket shared by every request made to codepost.io
+    requests wait for a token so they are spread out at the current rate; when codepost.io throttles a request
+    (429 or 503 response) the rate is halved and every request waits for the Retry-After time, and successful
+    requests raise the rate again by a fixed number of requests per second each second (additive increase,
+    multiplicative decrease) until it reaches maxRate
+    """
+
+    # status codes of responses that mean the request was not handled and can be made again
+    retryStatusCodes = (429, 502, 503, 504)
+    # methods that can be made again after a gateway error since making them twice has the same result
+    idempotentMethods = ("GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE")
+
+    @staticmethod
+    def shouldRetry(method: str, statusCode: int, retryAfter: Optional[str]) -> bool:
+        """
+        a gateway error (502, 503, or 504) can come after codepost.io already handled the request so a POST (that
+        creates a file or submission) is only made again when it was throttled (429 or a 503 with a Retry-After header)
+        :param method: HTTP method of the request
+        :param statusCode: status code of the response
+        :param retryAfter: value of the response's Retry-After header (None if it did not have one)
+        :return: True if the request should be made again
+        """
+        if statusCode not in CPRateLimiter.retryStatusCodes:
+            return False
+        if method.upper() in CPRateLimiter.idempotentMethods:
+            return True
+        return statusCode == 429 or (statusCode == 503 and retryAfter is not None)
+
+    @staticmethod
+    def retryAfter(value: Optional[str]) -> Optional[float]:
+        """
+        :param value: value of a Retry-After header (a number of seconds or an HTTP date)
+        :return: number of seconds to wait or None if value is missing or not understood
+        """
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def __init__(self, rate: float = 50.0, maxRate: Optional[float] = 100.0, minRate: float = 0.5, burst: int = 10,
+                 maxRetries: int = 6, baseDelay: float = 0.5, maxDelay: float = 60.0, increase: float = 5.0):
+        """
+        :param rate: number of requests per second to start at
+        :param maxRate: largest number of requests per second the rate increases to (None for no limit, so the rate keeps
+                        increasing until codepost.io throttles a request)
+        :param minRate: smallest number of requests per second the rate decreases to
+        :param burst: number of requests that can be made at once after the limiter has been idle
+        :param maxRetries: number of times a throttled request is made again before giving up
+        :param baseDelay: seconds to wait before the first retry when the response has no Retry-After header
+        :param maxDelay: largest number of seconds to wait before a retry
+        :param increase: number of requests per second the rate increases by for each second of successful requests
+        """
+        self.maxRate = maxRate
+        self.minRate = minRate
+        self.maxRetries = maxRetries
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.increase = increase
+        self._rate = rate if maxRate is None else min(rate, maxRate)
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        # no tokens are handed out before this time (set from Retry-After)
+        self._pausedUntil = 0.0
+        self._lock = threading.Lock()
+        self.throttledCount = 0
+
+    def __str__(self) -> str:
+        return f"{self._rate:0.1f} requests/second ({self.throttledCount} requests throttled)"
+
+    def rate(self) -> float:
+        """
+        :return: current number of requests per second
+        """
+        return self._rate
+
+    def reserve(self) -> float:
+        """
+        take a token for a request
+        :return: number of seconds to wait before making the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            # the token is taken now even if there are not enough so waiting requests keep their order
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+            return max(wait, self._pausedUntil - now)
+
+    def acquire(self) -> None:
+        """wait until a request can be made"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def succeeded(self) -> None:
+        """record a request that was not throttled so the rate increases"""
+        with self._lock:
+            # adding increase / rate per request adds about increase requests per second each second at any rate
+            self._rate += self.increase / self._rate
+            if self.maxRate is not None:
+                self._rate = min(self.maxRate, self._rate)
+
+    def throttled(self, attempt: int, retryAfter: float = None) -> float:
+        """
+        record a throttled request, slowing down every request
+        :param attempt: number of times the request has already been retried
+        :param retryAfter: seconds from the response's Retry-After header (None if it did not have one)
+        :return: number of seconds to wait before making the request again
+        """
+        if retryAfter is None:
+            # exponential backoff with jitter so the threads do not all retry at the same time
+            delay = min(self.maxDelay, self.baseDelay * 2 ** attempt)
+            delay = random.uniform(delay / 2, delay)
+        else:
+            delay = min(self.maxDelay, retryAfter)
+        with self._lock:
+            self.throttledCount += 1
+            now = time.monotonic()
+            # requests made at the same time are throttled together so only slow down once for them
+            if now >= self._pausedUntil:
+                self._rate = max(self.minRate, self._rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._pausedUntil = max(self._pausedUntil, now + delay)
+        return delay
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from CPRateLimiter import CPRateLimiter
+from CPStats import CPStats
+
+# ----------------------------------------------------------------------
+
+class _RateLimitedSession(requests.Session):
+    """
+    requests session that waits for the rate limiter before each request, retries throttled requests,
+    and records the time each request takes
+    """
+
+    def __init__(self, limiter: CPRateLimiter, calls: CPStats):
+        super().__init__()
+        self.limiter = limiter
+        self.calls = calls
+
+    def request(self, method, url, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            start = time.perf_counter()
+            response = super().request(method, url, *args, **kwargs)
+            self.calls.record(method, url, time.perf_counter() - start, response.status_code)
+            if response.status_code not in CPRateLimiter.retryStatusCodes:
+                self.limiter.succeeded()
+                return response
+            if attempt >= self.limiter.maxRetries or \
+                    not CPRateLimiter.shouldRetry(method, response.status_code, response.headers.get("Retry-After")):
+                return response
+            retryAfter = CPRateLimiter.retryAfter(response.headers.get("Retry-After"))
+            time.sleep(self.limiter.throttled(attempt, retryAfter))
+            attempt += 1
+
+# ----------------------------------------------------------------------
+
+class CPSession:
+    """
+    keep-alive HTTP session shared by every request the codepost module makes
+    it keeps up to poolSize connections to codepost.io open so the worker threads reuse them instead of each thread
+    connecting (and doing a TLS handshake) on its own, and it counts how often a connection is reused
+    requests are spaced out by a CPRateLimiter and requests codepost.io throttles are made again
+    """
+
+    def __init__(self, poolSize: int = 1, limiter: CPRateLimiter = None):
+        """
+        :param poolSize: number of connections kept open (the number of worker threads)
+        :param limiter: rate limiter every request waits for (a CPRateLimiter with its default rates if None)
+        """
+        self.limiter = limiter if limiter is not None else CPRateLimiter()
+        # count and latency of the requests by operation
+        self.calls = CPStats()
+        self.session = _RateLimitedSession(self.limiter, self.calls)
+        self._lock = threading.Lock()
+        self._adapter = None
+        self._poolSize = 0
+        # counts from adapters that were replaced by resize
+        self._requests = 0
+        self._connections = 0
+        self.resize(poolSize)
+
+    def __str__(self) -> str:
+        stats = self.stats()
+        return (f"{stats['requests']} requests over {stats['connections']} connections "
+                f"({stats['reused']} reused, pool size {stats['poolSize']})")
+
+    def resize(self, poolSize: int) -> None:
+        """
+        :param poolSize: number of connections to keep open (the pool only grows so existing connections are kept)
+        """
+        poolSize = max(1, poolSize)
+        with self._lock:
+            if poolSize <= self._poolSize:
+                return
+            if self._adapter is not None:
+                requestCount, connectionCount = self._counts()
+                self._requests += requestCount
+                self._connections += connectionCount
+                self._adapter.close()
+            # pool_block makes a thread wait for a free connection instead of opening one that is then discarded
+            self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize, pool_block=True)
+            self.session.mount("https://", self._adapter)
+            self.session.mount("http://", self._adapter)
+            self._poolSize = poolSize
+
+    def _counts(self) -> (int, int):
+        """
+        :return: number of requests made and connections opened by the current adapter's connection pools
+        """
+        pools = self._adapter.poolmanager.pools
+        requestCount = 0
+        connectionCount = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requestCount += pool.num_requests
+                connectionCount += pool.num_connections
+        return requestCount, connectionCount
+
+    def stats(self) -> dict:
+        """
+        :return: dictionary with the number of requests, connections opened, requests that reused a connection,
+                 and the pool size
+        """
+        with self._lock:
+            requestCount, connectionCount = self._counts()
+            requestCount += self._requests
+            connectionCount += self._connections
+            return {"requests": requestCount, "connections": connectionCount,
+                    "reused": max(0, requestCount - connectionCount), "poolSize": self._poolSize}
+
+    def close(self) -> None:
+        """close the open connections"""
+        self.session.close()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import gzip
+import json
+import os
+import time
+
+from CPAPI import CP, CPAssignment, CPComment, CPFile, _fieldsOf, _loaded, _resource
+
+# ----------------------------------------------------------------------
+
+class CPSnapshot:
+    """
+    local copy of an assignment (its submissions, the contents of their files, their comments, and the rubric)
+    stored in one gzipped JSON file so feedback can be rendered again without connecting to codepost.io
+    """
+
+    filename = ".codepost-snapshot.json.gz"
+    version = 1
+
+    @staticmethod
+    def defaultPath(dirPath: str) -> str:
+        """
+        :param dirPath: assignment directory (the directory containing the student directories)
+        :return: path of the snapshot file in the directory
+        """
+        return os.path.join(dirPath, CPSnapshot.filename)
+
+    @staticmethod
+    def save(path: str, course: str, assignmentName: str, assignment: CPAssignment) -> dict:
+        """
+        retrieve everything for the assignment from codepost.io (in parallel if CP.workers > 1) and write the snapshot
+        :param path: path of the snapshot file to write
+        :param course: name of the course
+        :param assignmentName: name of the assignment
+        :param assignment: assignment to save
+        :return: dictionary with the number of submissions, files, and comments saved
+        """
+        categories = assignment.rubricCategories()
+        rubric = {"rubricCategories": [c._data for c in categories],
+                  "rubricComments": [rc._data for c in categories for rc in c.comments()]}
+
+        def submissionData(submission):
+            files = []
+            for f in submission.files():
+                f._load()
+                comments = []
+                for c in f.comments():
+                    c._load()
+                    comments.append(c._data)
+                files.append({"file": f._data, "comments": comments})
+            return {"submission": _fieldsOf(submission._submission), "files": files}
+
+        submissions = CP.map(submissionData, assignment.submissions())
+        data = {"version": CPSnapshot.version, "saved": time.time(), "course": course, "assignment": assignmentName,
+                "assignmentFields": _fieldsOf(assignment._assignment), "rubric": rubric, "submissions": submissions}
+
+        tempPath = f"{path}.tmp"
+        with gzip.open(tempPath, "wt", encoding="utf8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tempPath, path)
+        return {"submissions": len(submissions),
+                "files": sum(len(s["files"]) for s in submissions),
+                "comments": sum(len(f["comments"]) for s in submissions for f in s["files"])}
+
+    def __init__(self, path: str):
+        """
+        :param path: path of a snapshot file written by CPSnapshot.save
+        """
+        self._path = path
+        with gzip.open(path, "rt", encoding="utf8") as f:
+            self._data = json.load(f)
+        if self._data.get("version") != CPSnapshot.version:
+            raise ValueError(f"{path} was written by a different version of CPSnapshot; make the snapshot again")
+
+    def __str__(self) -> str:
+        return self._path
+
+    def course(self) -> str:
+        return self._data["course"]
+
+    def assignmentName(self) -> str:
+        return self._data["assignment"]
+
+    def savedTime(self) -> float:
+        """
+        :return: time (seconds since the epoch) the snapshot was made
+        """
+        return self._data["saved"]
+
+    def assignment(self) -> CPAssignment:
+        """
+        :return: the assignment with its rubric, submissions, files, and comments all loaded from the snapshot so
+                 using them (such as CPSubmission.rubricCommentsByFile) does not make any requests
+        """
+        submissions = self._data["submissions"]
+        assignment = CPAssignment(_resource("assignment", self._data["assignmentFields"]),
+                                  [_resource("submission", s["submission"]) for s in submissions])
+        assignment._setRubric(self._data["rubric"])
+        for category in assignment.rubricCategories():
+            _loaded(category)
+            for rubricComment in category.comments():
+                _loaded(rubricComment)
+
+        for s in submissions:
+            students = s["submission"]["students"]
+            submission = assignment.submissionForStudent(students[0])
+            version = submission._version
+            files = []
+            for f in s["files"]:
+                cpFile = _loaded(CPFile(f["file"], version))
+                cpFile._comments = [_loaded(CPComment(c, version)) for c in f["comments"]]
+                files.append(cpFile)
+            submission._files = files
+        return assignment
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import json
+import math
+import threading
+from urllib.parse import urlsplit
+
+# ----------------------------------------------------------------------
+
+class CPStats:
+    """
+    count and time of every request made to codepost.io grouped by operation
+    an operation is the kind of request and the endpoint without ids, such as "retrieve files" or
+    "list assignments/submissions", so a run that retrieves each file or comment separately is easy to spot
+    """
+
+    @staticmethod
+    def operationFor(method: str, url: str) -> str:
+        """
+        :param method: HTTP method of the request
+        :param url: URL (or path) of the request
+        :return: name of the operation such as "retrieve comments" or "create files"
+        """
+        parts = [p for p in urlsplit(url).path.split("/") if p != ""]
+        resource = "/".join(p for p in parts if not p.isdigit())
+        method = method.upper()
+        if method == "GET":
+            kind = "retrieve" if len(parts) > 0 and parts[-1].isdigit() else "list"
+        elif method == "POST":
+            kind = "create"
+        elif method in ("PATCH", "PUT"):
+            kind = "update"
+        elif method == "DELETE":
+            kind = "delete"
+        else:
+            kind = method.lower()
+        return f"{kind} {resource}"
+
+    @staticmethod
+    def percentile(sortedValues: list, fraction: float) -> float:
+        """
+        :param sortedValues: values sorted in increasing order
+        :param fraction: percentile as a fraction (0.95 for the 95th percentile)
+        :return: the value at that percentile (nearest rank) or 0.0 if there are no values
+        """
+        if len(sortedValues) == 0:
+            return 0.0
+        rank = max(1, math.ceil(fraction * len(sortedValues)))
+        return sortedValues[rank - 1]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+
+    def record(self, method: str, url: str, seconds: float, statusCode: int = 200) -> None:
+        """
+        record a request
+        :param method: HTTP method of the request
+        :param url: URL of the request
+        :param seconds: time from sending the request until the response was received
+        :param statusCode: status code of the response
+        """
+        operation = CPStats.operationFor(method, url)
+        with self._lock:
+            self._latencies.setdefault(operation, []).append(seconds)
+            if statusCode >= 400:
+                self._errors[operation] = self._errors.get(operation, 0) + 1
+
+    def summary(self) -> dict:
+        """
+        :return: dictionary of operation name to a dictionary with the count, errors, and total seconds and the
+                 mean, p50, p95, p99, and max latencies in milliseconds, and the same for all operations as "total"
+        """
+        with self._lock:
+            latencies = {operation: sorted(values) for operation, values in self._latencies.items()}
+            errors = dict(self._errors)
+        latencies["total"] = sorted(v for values in latencies.values() for v in values)
+        errors["total"] = sum(errors.values())
+
+        summary = {}
+        for operation, values in latencies.items():
+            total = sum(values)
+            summary[operation] = {
+                "count": len(values),
+                "errors": errors.get(operation, 0),
+                "seconds": round(total, 3),
+                "mean": round(1000 * total / len(values), 1) if len(values) > 0 else 0.0,
+                "p50": round(1000 * CPStats.percentile(values, 0.50), 1),
+                "p95": round(1000 * CPStats.percentile(values, 0.95), 1),
+                "p99": round(1000 * CPStats.percentile(values, 0.99), 1),
+                "max": round(1000 * values[-1], 1) if len(values) > 0 else 0.0,
+            }
+        return summary
+
+    def table(self) -> str:
+        """
+        :return: summary as a table with a line per operation, most time first, and the total last
+        """
+        summary = self.summary()
+        total = summary.pop("total")
+        width = max([len("operation")] + [len(operation) for operation in summary])
+        lines = [f"{'operation':{width}s} {'count':>6s} {'errors':>6s} {'seconds':>8s} {'mean':>8s} {'p50':>8s} "
+                 f"{'p95':>8s} {'p99':>8s} {'max':>8s}"]
+        rows = sorted(summary.items(), key=lambda item: -item[1]["seconds"])
+        for operation, s in rows + [("total", total)]:
+            lines.append(f"{operation:{width}s} {s['count']:6d} {s['errors']:6d} {s['seconds']:8.2f} {s['mean']:8.1f} "
+                         f"{s['p50']:8.1f} {s['p95']:8.1f} {s['p99']:8.1f} {s['max']:8.1f}")
+        lines.append("(latencies in milliseconds)")
+        return "\n".join(lines)
+
+    def toJSON(self, **extra) -> str:
+        """
+        :param extra: other values to include (such as the script name or the connection statistics)
+        :return: summary as JSON with the operations under "operations"
+        """
+        data = dict(extra)
+        data["operations"] = self.summary()
+        return json.dumps(data, indent=1, sort_keys=True)
@@ -6,22 +6,55 @@
 # 02/14/2020
 # ----------------------------------------------------------------------
 
+from __future__ import annotations
+from collections import namedtuple
+import ctypes
+import ctypes.util
+import filecmp
 import os.path
-import glob
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from typing import Iterator, Optional
 
 # ----------------------------------------------------------------------
 
+# size, modification time and type of a directory entry recorded when the directory is scanned
+EntryInfo = namedtuple("EntryInfo", ["path", "isDir", "size", "mtime"])
+
 class DirectoryInfo:
     "class for accessing contents of a directory"
 
-    def __init__(self, dirPath, *args):
+    @staticmethod
+    def forAssignment(dirPath, *args, recursive: bool = False) -> DirectoryInfo:
+        """
+        scan an assignment directory and every student directory in it once so the scripts can use subdirectory()
+        instead of scanning each student directory again
+        :param dirPath: path for the assignment directory
+        :param args: any additional directories to add onto end of path
+        :param recursive: if True, the student directories include the contents of their subdirectories
+        :return: DirectoryInfo for the assignment directory
+        """
+        info = DirectoryInfo(dirPath, *args)
+        for path in info.directories():
+            info._subdirectories[path] = DirectoryInfo(path, recursive=recursive)
+        return info
+
+    def __init__(self, dirPath, *args, recursive: bool = False):
         """
         :param dirPath: path for the directory
         :param args: any additional directories to add onto end of path
+        :param recursive: if True, files() and directories() include the contents of every subdirectory
         """
         self._dirPath = os.path.join(dirPath, *args)
+        self._recursive = recursive
         self._files = set()
         self._directories = set()
+        self._entries = {}
+        self._subdirectories = {}
         self.updateFileInfo()
 
     def __str__(self) -> str:
@@ -31,12 +64,71 @@ class DirectoryInfo:
         "refresh the contents of the directory"
         self._files.clear()
         self._directories.clear()
-        allFiles = glob.glob(f"{self._dirPath}/*")
-        for f in allFiles:
-            if os.path.isdir(f):
-                self._directories.add(f)
-            else:
-                self._files.add(f)
+        self._entries.clear()
+        self._subdirectories.clear()
+        toScan = []
+        try:
+            with os.scandir(self._dirPath) as it:
+                for entry in it:
+                    # skip hidden files like glob does
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        isDir = entry.is_dir()
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    self._entries[entry.path] = EntryInfo(entry.path, isDir, stat.st_size, stat.st_mtime)
+                    if isDir:
+                        self._directories.add(entry.path)
+                        # do not follow links to directories since they could lead back to this directory
+                        if not entry.is_symlink():
+                            toScan.append(entry.path)
+                    else:
+                        self._files.add(entry.path)
+        except OSError:
+            return
+
+        if self._recursive:
+            for path in toScan:
+                subdirectory = DirectoryInfo(path, recursive=True)
+                self._subdirectories[path] = subdirectory
+                self._files.update(subdirectory.files())
+                self._directories.update(subdirectory.directories())
+                self._entries.update(subdirectory._entries)
+
+    def subdirectory(self, name, recursive: bool = False) -> DirectoryInfo:
+        """
+        :param name: name or path of a directory in this directory
+        :param recursive: passed to DirectoryInfo if the directory was not scanned with this directory
+        :return: DirectoryInfo for the directory (from this directory's scan if it was scanned then)
+        """
+        path = os.path.join(self._dirPath, name)
+        if path not in self._subdirectories:
+            self._subdirectories[path] = DirectoryInfo(path, recursive=recursive)
+        return self._subdirectories[path]
+
+    def entryInfo(self, path) -> Optional[EntryInfo]:
+        """
+        :param path: path of a file or directory in this directory
+        :return: EntryInfo with the size, modification time and type recorded when the directory was scanned
+                 (None if path was not in the directory)
+        """
+        return self._entries.get(str(path))
+
+    def size(self, path) -> int:
+        """
+        :param path: path of a file in this directory
+        :return: size of the file in bytes when the directory was scanned
+        """
+        return self._entries[str(path)].size
+
+    def modificationTime(self, path) -> float:
+        """
+        :param path: path of a file or directory in this directory
+        :return: modification time (seconds since the epoch) when the directory was scanned
+        """
+        return self._entries[str(path)].mtime
 
     def directories(self) -> set:
         "returns set of directories in the directory"
@@ -73,6 +165,9 @@ class DirectoryInfo:
 
 class FileInfo:
 
+    # bytes removed from files read as ASCII
+    _nonASCIIBytes = bytes([0]) + bytes(range(128, 256))
+
     @staticmethod
     def extensionForFilePath(filePath):
         return os.path.splitext(filePath)[-1]
@@ -133,6 +228,7 @@ class FileInfo:
         """
         self._filePath = os.path.join(filePath, *args)
         self._contents = None
+        self._encoding = None
 
     def __str__(self) -> str:
         return self._filePath
@@ -160,21 +256,51 @@ class FileInfo:
     def extension(self) -> str:
         return FileInfo.extensionForFilePath(self._filePath)
 
-    def contentsOf(self) -> str:
-        """returns data in the file or empty string if file does not exist"""
-        if self._contents is None:
+    @staticmethod
+    def decode(data: bytes, encoding: str = "ascii") -> str:
+        """
+        :param data: bytes read from a file
+        :param encoding: "ascii" to remove any bytes that are not ASCII characters or "utf8" to decode data as UTF-8
+                         (replacing invalid sequences with U+FFFD)
+        :return: data decoded as a string with any 0 bytes removed
+        """
+        if encoding == "ascii":
+            # delete the bytes in C instead of checking each one in Python
+            return data.translate(None, FileInfo._nonASCIIBytes).decode("ascii")
+        elif encoding == "utf8":
+            return data.replace(b"\0", b"").decode("utf8", errors="replace")
+        raise ValueError(f"unsupported encoding {encoding}")
+
+    def contentsOf(self, encoding: str = "ascii") -> str:
+        """
+        returns data in the file or empty string if file does not exist
+        :param encoding: "ascii" to limit the contents to ASCII characters (not including 0) or "utf8" to decode the file
+                         as UTF-8
+        """
+        if self._contents is None or self._encoding != encoding:
             if os.path.exists(self._filePath):
                 with open(self._filePath, 'rb') as f:
                     try:
-                        s = f.read()
-                        # limit to only ASCII characters not including 0
-                        self._contents = "".join([chr(x) for x in s if 0 < x < 128])
-                    except:
+                        self._contents = FileInfo.decode(f.read(), encoding)
+                        self._encoding = encoding
+                    except OSError:
                         print(f"error reading {self}")
             else:
                 self._contents = ""
+                self._encoding = encoding
         return self._contents
 
+    def lines(self, encoding: str = "ascii") -> Iterator[str]:
+        """
+        the lines of the file one at a time (without reading the whole file) or nothing if the file does not exist
+        :param encoding: "ascii" or "utf8" the same as for contentsOf
+        :return: generator of the lines of the file including their newlines
+        """
+        if os.path.exists(self._filePath):
+            with open(self._filePath, 'rb') as f:
+                for line in f:
+                    yield FileInfo.decode(line, encoding)
+
     def cpInfo(self):
         """
         if it is a directory, returns Course, Assignment, StudentEmail
@@ -221,6 +347,248 @@ class FileInfo:
         with open(self._filePath, 'w') as f:
             f.write(newContents)
 
+class AtomicWriter:
+    """
+    writes a file by writing to a temporary file in the same directory and renaming it to the file when it is closed,
+    so the file never contains partly written contents (if an exception happens the file is left as it was)
+    use it with a with statement and call write for each piece of the contents
+    """
+
+    def __init__(self, filePath, *args, onlyIfChanged: bool = True):
+        """
+        :param filePath: path for the file
+        :param args: any additional directories and filename to add onto end of path
+        :param onlyIfChanged: if True, the file is not replaced when it already has the same contents
+        """
+        self._filePath = os.path.join(filePath, *args)
+        self._onlyIfChanged = onlyIfChanged
+        directory, name = os.path.split(self._filePath)
+        self._tempPath = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._file = None
+        self.changed = False
+
+    def __enter__(self) -> AtomicWriter:
+        # create the file with the usual permissions (0o666 less the umask) instead of the 0o600 of tempfile
+        fd = os.open(self._tempPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        self._file = open(fd, 'w')
+        return self
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self._file.close()
+        if excType is not None:
+            os.remove(self._tempPath)
+            return
+        if self._onlyIfChanged and os.path.exists(self._filePath) and \
+                filecmp.cmp(self._tempPath, self._filePath, shallow=False):
+            os.remove(self._tempPath)
+        else:
+            if os.path.exists(self._filePath):
+                shutil.copymode(self._filePath, self._tempPath)
+            os.replace(self._tempPath, self._filePath)
+            self.changed = True
+
+class DirectoryWatcher:
+    """
+    watches the student directories in an assignment directory for files that are written, using inotify on Linux and
+    checking the size and modification time of the files every pollInterval seconds elsewhere
+    use changes() to wait for files to change
+    """
+
+    # inotify event masks (from sys/inotify.h)
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ISDIR = 0x40000000
+    _IN_CLOEXEC = 0o2000000
+
+    def __init__(self, dirPath, *args, recursive: bool = False, pollInterval: float = 1.0, usePolling: bool = False):
+        """
+        :param dirPath: path for the assignment directory
+        :param args: any additional directories to add onto end of path
+        :param recursive: if True, also watch the subdirectories of the student directories
+        :param pollInterval: number of seconds between checks of the files when not using inotify
+        :param usePolling: if True, check the files every pollInterval seconds even if inotify is available
+        """
+        self._dirPath = os.path.join(dirPath, *args)
+        self._recursive = recursive
+        self._pollInterval = pollInterval
+        self._fd = None
+        # inotify watch descriptor to the directory it watches and the depth of the directory below dirPath
+        self._watches = {}
+        self._files = {}
+        if not usePolling and sys.platform.startswith("linux"):
+            self._startInotify()
+        if self._fd is None:
+            self._files = self._scan()
+        self.backend = "polling" if self._fd is None else "inotify"
+
+    def __str__(self) -> str:
+        return self._dirPath
+
+    def __enter__(self) -> DirectoryWatcher:
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        "stop watching the directories"
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+
+    def changes(self, debounce: float = 1.0, maxWait: float = 10.0) -> Iterator[set]:
+        """
+        wait for files to be written, collecting a burst of changes until no file has been written for debounce
+        seconds (or maxWait seconds after the first change) so a test script rewriting several files is one change
+        :param debounce: number of seconds without a change that ends a burst of changes
+        :param maxWait: most seconds to collect a burst of changes for
+        :return: iterator of the set of paths of the files written in each burst (waits forever for the next one)
+        """
+        while True:
+            changed = self._wait(None)
+            start = time.monotonic()
+            while True:
+                remaining = maxWait - (time.monotonic() - start)
+                if remaining <= 0:
+                    break
+                more = self._wait(min(debounce, remaining))
+                if len(more) == 0:
+                    break
+                changed |= more
+            yield changed
+
+    def _wait(self, timeout: Optional[float]) -> set:
+        """
+        :param timeout: most seconds to wait for a change or None to wait until one happens
+        :return: set of paths of the files written (empty if none were written before timeout)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._fd is not None:
+                changed = self._readEvents(remaining)
+            else:
+                time.sleep(self._pollInterval if remaining is None else min(self._pollInterval, remaining))
+                changed = self._pollFiles()
+            if len(changed) > 0 or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def _scan(self, dirPath: str = None) -> dict:
+        """
+        :param dirPath: student directory to scan or None to scan every student directory
+        :return: dictionary of path to (size, modification time) for the files in the student directories
+        """
+        if dirPath is None:
+            directories = DirectoryInfo(self._dirPath).directories()
+        else:
+            directories = [dirPath]
+        files = {}
+        for path in directories:
+            info = DirectoryInfo(path, recursive=self._recursive)
+            for f in info.files():
+                files[f] = (info.size(f), info.modificationTime(f))
+        return files
+
+    def _pollFiles(self) -> set:
+        """
+        :return: set of paths of the files that are new or have a different size or modification time than the last
+                 time the files were checked
+        """
+        files = self._scan()
+        changed = set(path for path, stat in files.items() if self._files.get(path) != stat)
+        self._files = files
+        return changed
+
+    def _startInotify(self) -> None:
+        "watch the assignment directory and student directories with inotify (leaves self._fd None if unavailable)"
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self._addWatch = libc.inotify_add_watch
+            self._addWatch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            fd = libc.inotify_init1(DirectoryWatcher._IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        self._fd = fd
+        if not self._watch(self._dirPath, 0):
+            self.close()
+            return
+        for path in DirectoryInfo(self._dirPath).directories():
+            if not self._watchTree(path, 1):
+                # probably out of inotify watches so check the files instead
+                self.close()
+                return
+
+    def _watch(self, path: str, depth: int) -> bool:
+        """
+        :param path: directory to watch
+        :param depth: number of directories path is below the assignment directory
+        :return: True if the directory is watched
+        """
+        mask = DirectoryWatcher._IN_CLOSE_WRITE | DirectoryWatcher._IN_MOVED_TO | DirectoryWatcher._IN_CREATE
+        wd = self._addWatch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            return False
+        self._watches[wd] = (path, depth)
+        return True
+
+    def _watchTree(self, path: str, depth: int) -> bool:
+        """
+        watch a student directory (and its subdirectories if recursive)
+        :return: True if all the directories are watched
+        """
+        if not self._watch(path, depth):
+            return False
+        if self._recursive:
+            for subdirectory in DirectoryInfo(path, recursive=True).directories():
+                if not self._watch(subdirectory, depth + 1):
+                    return False
+        return True
+
+    def _readEvents(self, timeout: Optional[float]) -> set:
+        """
+        :param timeout: most seconds to wait for an event or None to wait until one happens
+        :return: set of paths of the files written
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if len(ready) == 0:
+            return set()
+        data = os.read(self._fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            # struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            name = os.fsdecode(data[offset + 16:offset + 16 + length].rstrip(b"\0"))
+            offset += 16 + length
+            if mask & DirectoryWatcher._IN_Q_OVERFLOW:
+                # events were lost so treat every file as written
+                changed.update(self._scan())
+                continue
+            if mask & DirectoryWatcher._IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if wd not in self._watches or name == "" or name.startswith("."):
+                continue
+            directory, depth = self._watches[wd]
+            path = os.path.join(directory, name)
+            if mask & DirectoryWatcher._IN_ISDIR:
+                # a new student directory (or subdirectory): watch it and include the files already written to it
+                if depth == 0 or self._recursive:
+                    self._watchTree(path, depth + 1)
+                    changed.update(self._scan(path) if depth == 0 else DirectoryInfo(path, recursive=True).files())
+            elif depth > 0 and mask & (DirectoryWatcher._IN_CLOSE_WRITE | DirectoryWatcher._IN_MOVED_TO):
+                changed.add(path)
+        return changed
+
 # ----------------------------------------------------------------------
 
 def main():
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# MockCodePost.py
+# local stand-in for the codepost.io REST endpoints used by CPAPI.py
+# ----------------------------------------------------------------------
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import codepost
+
+# ----------------------------------------------------------------------
+
+# codepost.io endpoint name -> fields holding ids of child objects
+_CHILDREN = {
+    "courses": "assignments",
+    "assignments": "rubricCategories",
+    "submissions": "files",
+    "files": "comments",
+    "rubricCategories": "rubricComments",
+}
+
+# child endpoint name -> (parent endpoint name, field in child naming the parent)
+_PARENTS = {
+    "assignments": ("courses", "course"),
+    "rubricCategories": ("assignments", "assignment"),
+    "files": ("submissions", "submission"),
+    "comments": ("files", "file"),
+    "rubricComments": ("rubricCategories", "category"),
+}
+
+
+class MockStore:
+    """in memory collection of codepost.io objects keyed by endpoint name and id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nextID = 1
+        self._objects = {name: {} for name in ("courses", "assignments", "submissions", "files",
+                                               "comments", "rubricCategories", "rubricComments")}
+        self.requestCounts = {}
+        self.latency = 0.0
+        self.hasRubricEndpoint = True
+        # if not None, requests past this many in a second get a 429 response with a Retry-After header
+        self.maxRate = None
+        self.retryAfter = 1
+        self.throttledCount = 0
+        self._recent = []
+
+    def add(self, kind: str, **fields) -> dict:
+        """
+        add an object to the store, linking it into its parent's list of children
+        :param kind: endpoint name such as "files"
+        :param fields: fields of the object
+        :return: the stored object
+        """
+        with self._lock:
+            obj = dict(fields)
+            obj["id"] = self._nextID
+            self._nextID += 1
+            if kind in _CHILDREN:
+                obj.setdefault(_CHILDREN[kind], [])
+            self._objects[kind][obj["id"]] = obj
+            if kind in _PARENTS:
+                parentKind, parentField = _PARENTS[kind]
+                parent = self._objects[parentKind].get(obj.get(parentField))
+                if parent is not None:
+                    parent[_CHILDREN[parentKind]].append(obj["id"])
+            self._touch(kind, obj)
+            return obj
+
+    def get(self, kind: str, objectID: int):
+        return self._objects[kind].get(objectID)
+
+    def all(self, kind: str) -> list:
+        return list(self._objects[kind].values())
+
+    def update(self, kind: str, objectID: int, **fields):
+        with self._lock:
+            obj = self._objects[kind].get(objectID)
+            if obj is not None:
+                obj.update(fields)
+                self._touch(kind, obj)
+            return obj
+
+    def delete(self, kind: str, objectID: int) -> bool:
+        with self._lock:
+            obj = self._objects[kind].pop(objectID, None)
+            if obj is None:
+                return False
+            if kind in _PARENTS:
+                parentKind, parentField = _PARENTS[kind]
+                parent = self._objects[parentKind].get(obj.get(parentField))
+                if parent is not None and objectID in parent[_CHILDREN[parentKind]]:
+                    parent[_CHILDREN[parentKind]].remove(objectID)
+            self._touch(kind, obj)
+            return True
+
+    def _touch(self, kind: str, obj: dict) -> None:
+        """update the modified timestamps of obj and the submission it belongs to"""
+        now = f"{time.time():.6f}"
+        obj["modified"] = now
+        while kind in _PARENTS:
+            if kind == "submissions":
+                break
+            kind, field = _PARENTS[kind][0], _PARENTS[kind][1]
+            obj = self._objects[kind].get(obj.get(field))
+            if obj is None:
+                return
+        if kind == "submissions" and obj is not None:
+            obj["modified"] = now
+            obj["dateEdited"] = now
+
+    def countRequest(self, method: str, kind: str) -> None:
+        with self._lock:
+            key = f"{method} {kind}"
+            self.requestCounts[key] = self.requestCounts.get(key, 0) + 1
+
+    def isThrottled(self) -> bool:
+        """
+        :return: True if the request being handled is past maxRate requests in the last second
+        """
+        if self.maxRate is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            if len(self._recent) >= self.maxRate:
+                self.throttledCount += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def totalRequests(self) -> int:
+        return sum(self.requestCounts.values())
+
+    def rubric(self, assignmentID: int) -> dict:
+        assignment = self.get("assignments", assignmentID)
+        categories = [self.get("rubricCategories", i) for i in assignment["rubricCategories"]]
+        comments = [self.get("rubricComments", i) for c in categories for i in c["rubricComments"]]
+        return {"rubricCategories": categories, "rubricComments": comments}
+
+# ----------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately so without this delayed ACKs add ~40 ms to each keep-alive request
+    disable_nagle_algorithm = True
+    store: MockStore = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body=None, headers: dict = None) -> None:
+        data = b"" if body is None else json.dumps(body).encode("utf8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        if length == 0:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf8"))
+
+    def _route(self, method: str) -> None:
+        path = self.path.split("?")[0]
+        parts = [p for p in path.split("/") if p != ""]
+        kind = parts[0] if parts else ""
+        self.store.countRequest(method, kind if len(parts) < 3 else f"{kind}/{parts[2]}")
+        if self.store.latency > 0:
+            time.sleep(self.store.latency)
+        if self.store.isThrottled():
+            self._body()
+            return self._send(429, {"detail": "Request was throttled."}, {"Retry-After": str(self.store.retryAfter)})
+        if kind not in self.store._objects:
+            return self._send(404, {"detail": "Not found."})
+
+        if method == "GET" and len(parts) == 1:
+            return self._send(200, self.store.all(kind))
+        if method == "POST" and len(parts) == 1:
+            return self._send(201, self.store.add(kind, **self._body()))
+
+        objectID = int(parts[1]) if len(parts) > 1 and re.fullmatch(r"\d+", parts[1]) else None
+        obj = self.store.get(kind, objectID)
+        if obj is None:
+            return self._send(404, {"detail": "Not found."})
+
+        if method == "GET" and len(parts) == 3 and kind == "assignments" and parts[2] == "submissions":
+            query = self.path.split("?")[1] if "?" in self.path else ""
+            student = dict(p.split("=", 1) for p in query.split("&") if "=" in p).get("student")
+            subs = [s for s in self.store.all("submissions") if s["assignment"] == objectID]
+            if student is not None:
+                student = student.replace("%40", "@")
+                subs = [s for s in subs if student in s["students"]]
+            return self._send(200, subs)
+        if method == "GET" and len(parts) == 3 and kind == "assignments" and parts[2] == "rubric" \
+                and self.store.hasRubricEndpoint:
+            return self._send(200, self.store.rubric(objectID))
+        if len(parts) > 2:
+            return self._send(404, {"detail": "Not found."})
+        if method == "GET":
+            return self._send(200, obj)
+        if method == "PATCH":
+            return self._send(200, self.store.update(kind, objectID, **self._body()))
+        if method == "DELETE":
+            self.store.delete(kind, objectID)
+            return self._send(204)
+        self._send(405, {"detail": "Method not allowed."})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class MockCodePostServer:
+    """threaded HTTP server serving a MockStore on localhost"""
+
+    def __init__(self, store: MockStore = None, port: int = 0):
+        self.store = store if store is not None else MockStore()
+        handler = type("Handler", (_Handler,), {"store": self.store})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# api key to use with the mock server (useMockServer marks it as valid so the SDK does not check it with codepost.io)
+mockAPIKey = "mock-api-key"
+
+def useMockServer(server: MockCodePostServer) -> None:
+    """
+    send the codepost SDK's requests to server instead of codepost.io
+    :param server: a started MockCodePostServer
+    """
+    useMockURL(server.url())
+
+
+def useMockURL(url: str) -> None:
+    """
+    send the codepost SDK's requests to the mock server at url instead of codepost.io
+    :param url: URL of a mock server (possibly running in another process)
+    """
+    codepost.util.config._checked_api_keys[mockAPIKey] = True
+    codepost.configure_api_key(mockAPIKey)
+    codepost.api_requestor.STATIC_REQUESTOR._base_url = url
+
+
+def makeCourse(store: MockStore, courseName="CS161", period="Fall 2026", assignmentName="Lab1",
+               numSubmissions=30, filesPerSubmission=2, commentsPerFile=3, linesPerFile=100,
+               rubric=((75, "Correctness", 8), (15, "Organization/Style", 6), (10, "Comments", 4))):
+    """
+    populate store with a synthetic course, assignment, rubric and submissions
+    (the assignment is added to the course if the store already has a course with the same name and period)
+    :return: the assignment dictionary
+    """
+    course = next((c for c in store.all("courses") if c["name"] == courseName and c["period"] == period), None)
+    if course is None:
+        course = store.add("courses", name=courseName, period=period)
+    assignment = store.add("assignments", name=assignmentName, course=course["id"], points=100)
+    rubricComments = []
+    for sortKey, (pointLimit, name, count) in enumerate(rubric):
+        category = store.add("rubricCategories", name=name, assignment=assignment["id"],
+                             pointLimit=pointLimit, sortKey=sortKey)
+        for i in range(count):
+            rubricComments.append(store.add("rubricComments", text=f"{name} issue {i}", pointDelta=i + 1,
+                                            category=category["id"], sortKey=i))
+    code = "\n".join(f"line {n} of the student's code" for n in range(linesPerFile))
+    for s in range(numSubmissions):
+        submission = store.add("submissions", assignment=assignment["id"], students=[f"student{s:04d}@x.edu"])
+        for f in range(filesPerSubmission):
+            file = store.add("files", name=f"file{f}.py", code=code, extension="py", submission=submission["id"])
+            for c in range(commentsPerFile):
+                rubricComment = rubricComments[(s + f + c) % len(rubricComments)] if c % 2 == 0 else None
+                store.add("comments", text=f"comment {c}", file=file["id"], startLine=c * 10, endLine=c * 10 + 2,
+                          startChar=0, endChar=0, pointDelta=None if rubricComment else 1.0,
+                          rubricComment=rubricComment["id"] if rubricComment else None)
+    return assignment
+
+
+def addComments(store: MockStore, assignmentID: int, commentsPerFile: int = 3) -> int:
+    """
+    add comments (every other one using a rubric comment) to every file of the assignment's submissions
+    as if the submissions were graded
+    :return: number of comments added
+    """
+    rubric = store.rubric(assignmentID)["rubricComments"]
+    count = 0
+    submissions = [s for s in store.all("submissions") if s["assignment"] == assignmentID]
+    for s, submission in enumerate(submissions):
+        for f, fileID in enumerate(list(submission["files"])):
+            for c in range(commentsPerFile):
+                rubricComment = rubric[(s + f + c) % len(rubric)] if c % 2 == 0 and len(rubric) > 0 else None
+                store.add("comments", text=f"comment {c}", file=fileID, startLine=c * 10, endLine=c * 10 + 2,
+                          startChar=0, endChar=0, pointDelta=None if rubricComment else 1.0,
+                          rubricComment=rubricComment["id"] if rubricComment else None)
+                count += 1
+    return count
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# benchAsync.py
+# compares the synchronous CPAPI wrappers with the CPAsync backend against the local mock codepost.io server
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from CPAPI import CP
+from CPAsync import CPAsync
+from MockCodePost import MockCodePostServer, MockStore, makeCourse, mockAPIKey, useMockServer
+
+# ----------------------------------------------------------------------
+
+def downloadSync(assignmentName: str) -> int:
+    """
+    retrieve the rubric and the comments of every file in the assignment with the CPAPI wrappers
+    :return: number of comments retrieved
+    """
+    cpAssignment = CP.course("CS161").assignment(assignmentName)
+    cpAssignment.rubricCategories()
+    count = 0
+    # the same as the download scripts: the worker threads retrieve the next submissions while one is used
+    for submission in CP.prefetch(lambda s: s.prefetch(), cpAssignment.submissions()):
+        for f in submission.files():
+            count += len(f.comments())
+    return count
+
+async def downloadAsync(assignmentName: str, concurrency: int) -> int:
+    """
+    retrieve the rubric and the comments of every file in the assignment with CPAsync
+    :return: number of comments retrieved
+    """
+    async with CPAsync(concurrency) as client:
+        cpAssignment = await client.assignment(CP.course("CS161"), assignmentName)
+        rubric = asyncio.ensure_future(client.rubricCategories(cpAssignment))
+        submissions = await client.submissions(cpAssignment)
+        files = [f for submission in submissions for f in submission.files()]
+        comments = await asyncio.gather(*(client.comments(f) for f in files))
+        await rubric
+    return sum(len(c) for c in comments)
+
+def timeIt(store: MockStore, label: str, func) -> None:
+    store.requestCounts.clear()
+    before = CP.connectionStats()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    after = CP.connectionStats()
+    print(f"{label:22s}: {elapsed:7.2f} s {store.totalRequests():6d} requests {count:6d} comments "
+          f"(shared session: {after['connections'] - before['connections']} connections opened, "
+          f"{after['reused'] - before['reused']} reused)")
+
+def main():
+    parser = ArgumentParser(description='benchmark the synchronous and asyncio codepost.io backends')
+    parser.add_argument('-n', '--submissions', dest='submissions', type=int, default=100,
+                        help='''number of submissions in the synthetic assignment''')
+    parser.add_argument('-l', '--latency', dest='latency', type=float, default=20,
+                        help='''milliseconds the mock server waits before answering each request''')
+    parser.add_argument('-w', '--workers', dest='workers', type=int, default=8,
+                        help='''number of threads for the synchronous backend and concurrency for the asyncio backend''')
+    options = parser.parse_args()
+
+    store = MockStore()
+    store.latency = options.latency / 1000
+    makeCourse(store, numSubmissions=options.submissions)
+    server = MockCodePostServer(store)
+    server.start()
+    useMockServer(server)
+
+    print(f"{options.submissions} submissions, {options.latency:.0f} ms latency")
+    CP.init(apiKey=mockAPIKey, workers=1, cache=False)
+    timeIt(store, "sync", lambda: downloadSync("Lab1"))
+    CP.init(apiKey=mockAPIKey, workers=options.workers, cache=False)
+    timeIt(store, f"sync {options.workers} workers", lambda: downloadSync("Lab1"))
+    timeIt(store, f"async concurrency {options.workers}",
+           lambda: asyncio.run(downloadAsync("Lab1", options.workers)))
+    server.stop()
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
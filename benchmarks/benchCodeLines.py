@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# benchCodeLines.py
+# compares CPFile.codeLines (line offsets into the code) with the list of lines it replaced on a large output file
+# with many comments
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from CPAPI import CPFile, _loaded
+
+# ----------------------------------------------------------------------
+
+class SplitLines:
+    """the original implementation of CPFile.codeLines"""
+
+    def __init__(self, code: str):
+        self._data = {"code": code}
+        self._code = None
+
+    def codeLines(self, startLine, endLine) -> str:
+        if self._code is None:
+            self._code = self._data["code"].split("\n")
+        return "\n".join(self._code[startLine:endLine+1])
+
+def run(makeFile, code: str, ranges: list) -> tuple:
+    """
+    :return: tuple of the seconds to get all the ranges of lines, the memory kept by the file object after, and the
+             lines returned
+    """
+    start = time.perf_counter()
+    f = makeFile(code)
+    lines = [f.codeLines(startLine, endLine) for startLine, endLine in ranges]
+    elapsed = time.perf_counter() - start
+
+    # measure the memory separately since tracing the allocations slows it down
+    tracemalloc.start()
+    f = makeFile(code)
+    before = tracemalloc.get_traced_memory()[0]
+    for startLine, endLine in ranges:
+        f.codeLines(startLine, endLine)
+    kept = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed, kept, lines
+
+def main():
+    parser = ArgumentParser(description='benchmark CPFile.codeLines')
+    parser.add_argument('-l', '--lines', dest='lines', type=int, default=200000,
+                        help='''number of lines in the file''')
+    parser.add_argument('-c', '--comments', dest='comments', type=int, default=2000,
+                        help='''number of comments on the file''')
+    options = parser.parse_args()
+
+    rng = random.Random(161)
+    code = "\n".join(f"test {i}: expected {rng.randint(0, 1000)} got {rng.randint(0, 1000)}"
+                     for i in range(options.lines))
+    ranges = []
+    for _ in range(options.comments):
+        startLine = rng.randrange(options.lines)
+        ranges.append((startLine, min(options.lines - 1, startLine + rng.randint(0, 5))))
+
+    splitTime, splitMemory, expected = run(SplitLines, code, ranges)
+    offsetTime, offsetMemory, lines = run(lambda c: _loaded(CPFile({"id": 1, "code": c})), code, ranges)
+    if lines != expected:
+        print("codeLines does not match the list of lines version")
+        sys.exit(1)
+
+    print(f"{len(code) / 1024 / 1024:0.1f} MB file with {options.lines} lines and {options.comments} comments")
+    print(f"list of lines : {splitTime * 1000:8.1f} ms {splitMemory / 1024 / 1024:8.1f} MB kept besides the code")
+    print(f"line offsets  : {offsetTime * 1000:8.1f} ms {offsetMemory / 1024 / 1024:8.1f} MB kept besides the code")
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# benchContentsOf.py
+# compares FileInfo.contentsOf with the per-byte filter it replaced on large files
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from FileUtils import FileInfo
+
+# ----------------------------------------------------------------------
+
+def perByteContentsOf(filePath: str) -> str:
+    """the original implementation of FileInfo.contentsOf"""
+    with open(filePath, 'rb') as f:
+        s = f.read()
+        return "".join([chr(x) for x in s if 0 < x < 128])
+
+def makeTestOutput(filePath: str, size: int) -> None:
+    """
+    write a file resembling test output (mostly ASCII with some UTF-8 and stray bytes)
+    :param filePath: path of the file to write
+    :param size: approximate number of bytes to write
+    """
+    rng = random.Random(161)
+    lines = [f"test {i}: expected {rng.randint(0, 1000)} got {rng.randint(0, 1000)}\n".encode("ascii")
+             for i in range(1000)]
+    lines.append("café ✓ passed\n".encode("utf8"))
+    lines.append(b"binary \x00\xff\xfe junk\n")
+    chunks = []
+    total = 0
+    while total < size:
+        line = rng.choice(lines)
+        chunks.append(line)
+        total += len(line)
+    with open(filePath, 'wb') as f:
+        f.write(b"".join(chunks))
+
+def timeIt(func, repeat: int) -> float:
+    """
+    :return: fastest time in seconds of repeat calls to func
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = ArgumentParser(description='benchmark FileInfo.contentsOf')
+    parser.add_argument('-s', '--size', dest='size', type=int, default=10,
+                        help='''size of the test file in MB''')
+    parser.add_argument('-r', '--repeat', dest='repeat', type=int, default=3,
+                        help='''number of times to run each version (the fastest time is reported)''')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filePath = os.path.join(directory, "grade.txt")
+        makeTestOutput(filePath, options.size * 1024 * 1024)
+
+        expected = perByteContentsOf(filePath)
+        if FileInfo(filePath).contentsOf() != expected:
+            print("ascii contentsOf does not match the per-byte version")
+            sys.exit(1)
+
+        perByte = timeIt(lambda: perByteContentsOf(filePath), options.repeat)
+        asciiTime = timeIt(lambda: FileInfo(filePath).contentsOf("ascii"), options.repeat)
+        utf8Time = timeIt(lambda: FileInfo(filePath).contentsOf("utf8"), options.repeat)
+
+    print(f"{options.size} MB file")
+    print(f"per-byte filter : {perByte * 1000:8.1f} ms")
+    print(f"ascii translate : {asciiTime * 1000:8.1f} ms ({perByte / asciiTime:5.1f}x)")
+    print(f"utf8 decode     : {utf8Time * 1000:8.1f} ms ({perByte / utf8Time:5.1f}x)")
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# benchScripts.py
+# runs the upload, download, submissions, and rubric scripts end to end against the local mock codepost.io server
+# for synthetic courses and reports the wall time, requests, and peak memory of each run
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+benchmarkDirectory = os.path.dirname(os.path.abspath(__file__))
+repoDirectory = os.path.dirname(benchmarkDirectory)
+sys.path.insert(0, benchmarkDirectory)
+from MockCodePost import MockCodePostServer, MockStore, addComments, makeCourse
+
+# ----------------------------------------------------------------------
+
+# run in each script's process to send its requests to the mock server before running the script
+_bootstrap = """
+import runpy, sys
+sys.path[0:0] = [sys.argv[1], sys.argv[2]]
+from MockCodePost import useMockURL
+useMockURL(sys.argv[3])
+script = sys.argv[4]
+sys.argv = sys.argv[4:]
+runpy.run_path(script, run_name="__main__")
+"""
+
+def runScript(store: MockStore, url: str, assignmentDirectory: str, home: str, script: str, args: list) -> dict:
+    """
+    run one of the scripts in its own process with the mock server
+    :return: dictionary with the wall time, number of requests, requests by endpoint, peak memory, and exit status
+    """
+    store.requestCounts.clear()
+    command = [sys.executable, "-c", _bootstrap, repoDirectory, benchmarkDirectory, url,
+               os.path.join(repoDirectory, script)] + args
+    env = dict(os.environ, HOME=home)
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=assignmentDirectory, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 gives the resource usage (including peak memory) of just this process
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    errors = process.stderr.read().decode("utf8", errors="replace")
+    process.stderr.close()
+    if process.returncode != 0:
+        print(errors, file=sys.stderr)
+    return {"seconds": round(elapsed, 2), "requests": store.totalRequests(), "byEndpoint": dict(store.requestCounts),
+            "peakMB": round(usage.ru_maxrss / 1024, 1), "status": process.returncode}
+
+def writeStudentDirectories(assignmentDirectory: str, numSubmissions: int, filesPerSubmission: int,
+                            linesPerFile: int) -> None:
+    """create a directory with files and a grade.txt for each student"""
+    code = "\n".join(f"line {n} of the student's code" for n in range(linesPerFile))
+    for s in range(numSubmissions):
+        studentDirectory = os.path.join(assignmentDirectory, f"student{s:04d}@x.edu")
+        os.makedirs(studentDirectory)
+        for f in range(filesPerSubmission):
+            with open(os.path.join(studentDirectory, f"file{f}.py"), "w") as out:
+                out.write(code)
+        with open(os.path.join(studentDirectory, "grade.txt"), "w") as out:
+            out.write(f"test output for student {s}\n")
+
+def benchmark(options, numSubmissions: int) -> list:
+    """
+    run the scripts for a synthetic course with numSubmissions submissions
+    :return: list of (name of the run, result dictionary)
+    """
+    store = MockStore()
+    store.latency = options.latency / 1000
+    rubric = ((75, "Correctness", options.rubricComments), (15, "Organization/Style", options.rubricComments),
+              (10, "Comments", options.rubricComments))
+    assignment = makeCourse(store, numSubmissions=0, rubric=rubric)
+    server = MockCodePostServer(store)
+    server.start()
+
+    results = []
+    workDirectory = tempfile.mkdtemp(prefix="cpbench")
+    try:
+        home = os.path.join(workDirectory, "home")
+        assignmentDirectory = os.path.join(workDirectory, "CS161", "Lab1")
+        os.makedirs(home)
+        os.makedirs(assignmentDirectory)
+        writeStudentDirectories(assignmentDirectory, numSubmissions, options.files, options.lines)
+        fileNames = [f"file{f}.py" for f in range(options.files)]
+        workers = ["-w", str(options.workers)]
+
+        def run(name, script, args):
+            result = runScript(store, server.url(), assignmentDirectory, home, script, args)
+            results.append((name, result))
+            print(f"{numSubmissions:5d} {name:22s} {result['seconds']:8.2f} s {result['requests']:7d} requests "
+                  f"{result['peakMB']:7.1f} MB" + ("" if result["status"] == 0 else f"  (exit {result['status']})"))
+
+        run("upload", "cpUploadFilesForAssignment.py", workers + fileNames)
+        run("upload (unchanged)", "cpUploadFilesForAssignment.py", workers + fileNames)
+        addComments(store, assignment["id"], options.comments)
+        run("download", "cpDownloadRubricAndComments.py", workers + fileNames)
+        run("download (unchanged)", "cpDownloadRubricAndComments.py", workers + fileNames)
+        run("submissions", "cpSubmissions.py", workers)
+        run("add rubric", "cpAddRubric.py", ["Lab1", os.path.join(repoDirectory, "rubric.txt")])
+    finally:
+        server.stop()
+        shutil.rmtree(workDirectory, ignore_errors=True)
+    return results
+
+def main():
+    parser = ArgumentParser(description='benchmark the scripts against a local mock codepost.io server')
+    parser.add_argument('-s', '--sizes', dest='sizes', type=int, nargs='+', default=[30, 300],
+                        help='''numbers of submissions in the synthetic courses (such as 30 300 3000)''')
+    parser.add_argument('-f', '--files', dest='files', type=int, default=2,
+                        help='''number of files in each submission''')
+    parser.add_argument('--lines', dest='lines', type=int, default=100,
+                        help='''number of lines in each file''')
+    parser.add_argument('--comments', dest='comments', type=int, default=3,
+                        help='''number of comments on each file''')
+    parser.add_argument('--rubric-comments', dest='rubricComments', type=int, default=6,
+                        help='''number of rubric comments in each of the three rubric categories''')
+    parser.add_argument('-l', '--latency', dest='latency', type=float, default=10,
+                        help='''milliseconds the mock server waits before answering each request''')
+    parser.add_argument('-w', '--workers', dest='workers', type=int, default=4,
+                        help='''number of workers the scripts use''')
+    parser.add_argument('--json', dest='jsonPath', default=None,
+                        help='''write the results to this JSON file''')
+    options = parser.parse_args()
+
+    print(f"{'size':>5s} {'run':22s} {'wall time':>10s} {'requests':>16s} {'peak memory':>10s}")
+    allResults = {}
+    for size in options.sizes:
+        allResults[size] = dict(benchmark(options, size))
+
+    if options.jsonPath is not None:
+        with open(options.jsonPath, "w") as f:
+            json.dump({"options": vars(options), "results": allResults}, f, indent=1)
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
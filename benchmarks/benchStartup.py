@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# benchStartup.py
+# measures the start up time of cp.py and each of its commands (running them with --help so no requests are made)
+# and exits with an error if cp.py or a command takes longer than a limit
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+benchmarkDirectory = os.path.dirname(os.path.abspath(__file__))
+repoDirectory = os.path.dirname(benchmarkDirectory)
+sys.path.insert(0, repoDirectory)
+from cp import commands
+
+# ----------------------------------------------------------------------
+
+def startupTimes(args: list, repeat: int) -> list:
+    """
+    :param args: arguments for cp.py
+    :param repeat: number of times to run it
+    :return: list of the number of milliseconds each run took
+    """
+    command = [sys.executable, os.path.join(repoDirectory, "cp.py")] + args
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=repoDirectory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def slowestImports(args: list, count: int) -> list:
+    """
+    :param args: arguments for cp.py
+    :param count: number of modules to return
+    :return: list of (milliseconds, module name) for the top level modules that took the longest to import
+    """
+    command = [sys.executable, "-X", "importtime", os.path.join(repoDirectory, "cp.py")] + args
+    process = subprocess.run(command, cwd=repoDirectory, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                             text=True, check=True)
+    imports = []
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package (nested imports are indented)
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue
+        imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = ArgumentParser(description='measure the start up time of cp.py and each of its commands')
+    parser.add_argument('-n', '--repeat', dest='repeat', type=int, default=5,
+                        help='''number of times to run each command (the median time is reported)''')
+    parser.add_argument('--max-cp-ms', dest='maxCP', type=float, default=None,
+                        help='''exit with an error if cp.py --help takes longer than this many milliseconds''')
+    parser.add_argument('--max-command-ms', dest='maxCommand', type=float, default=None,
+                        help='''exit with an error if any command takes longer than this many milliseconds''')
+    parser.add_argument('--imports', dest='imports', type=int, default=0,
+                        help='''also print this many of the slowest modules imported by each command''')
+    parser.add_argument("commands", nargs='*', default=None,
+                        help='''commands to measure (defaults to all of them)''')
+    options = parser.parse_args()
+
+    names = options.commands if len(options.commands) > 0 else list(commands)
+    width = max(len(name) for name in ["cp"] + names)
+    print(f"{'command':{width}s} {'median':>8s} {'min':>8s}  (ms)")
+    failed = []
+    runs = [("cp", [], options.maxCP)] + [(name, [name], options.maxCommand) for name in names]
+    for name, args, limit in runs:
+        times = startupTimes(args + ["--help"], options.repeat)
+        median = statistics.median(times)
+        over = limit is not None and median > limit
+        if over:
+            failed.append(name)
+        print(f"{name:{width}s} {median:8.1f} {min(times):8.1f}{'  over the limit' if over else ''}")
+        for milliseconds, module in slowestImports(args + ["--help"], options.imports):
+            print(f"{'':{width}s}   {milliseconds:8.1f} {module}")
+
+    if len(failed) > 0:
+        print(f"too slow to start: {' '.join(failed)}")
+        sys.exit(1)
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
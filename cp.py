@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# cp.py
+# one command for all the scripts (cp upload, cp download, ...); several subcommands separated by + run in one
+# process sharing the codepost.io session and cache
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser, RawDescriptionHelpFormatter, REMAINDER
+import importlib
+import sys
+
+# ----------------------------------------------------------------------
+
+# subcommand name to the script that implements it and its description; a script (and the codepost module) is only
+# imported when its subcommand is run so cp --help and argument errors do not wait for it
+commands = {
+    "make": ("cpMakeAssignment", "make a codepost.io assignment for a course"),
+    "rubric": ("cpAddRubric", "add a rubric to a codepost.io assignment"),
+    "upload": ("cpUploadFilesForAssignment", "upload files to a codepost.io assignment for the student directories"),
+    "upload-dir": ("cpUploadFilesInDirectory", "upload the files in the current directory for one student"),
+    "grades": ("cpUploadGradesForAssignment", "upload the grade files for all students"),
+    "download": ("cpDownloadRubricAndComments", "download comments and rubric grades into the grade files"),
+    "comments": ("cpDownloadComments", "download comments into the grade files"),
+    "course": ("cpDownloadCourse", "download comments for every assignment of a course"),
+    "submissions": ("cpSubmissions", "download the submitted files"),
+    "snapshot": ("cpSnapshot", "save an assignment to a local snapshot file"),
+    "gradebook": ("cpGradebook", "export the grades to a CSV gradebook"),
+}
+
+separator = "+"
+
+def splitCommands(args: list) -> list:
+    """
+    :param args: command line arguments after the program name
+    :return: list of the arguments of each subcommand (split at each + argument)
+    """
+    groups = [[]]
+    for arg in args:
+        if arg == separator:
+            groups.append([])
+        else:
+            groups[-1].append(arg)
+    return groups
+
+def runCommand(name: str, args: list) -> None:
+    """
+    import the script for a subcommand and run its main function
+    :param name: name of the subcommand
+    :param args: arguments for the subcommand
+    """
+    module = importlib.import_module(commands[name][0])
+    module.main(args, prog=f"cp {name}")
+
+def main(args: list = None):
+    width = max(len(name) for name in commands)
+    epilog = "commands:\n" + "\n".join(f"  {name:{width}s}  {description}"
+                                       for name, (_, description) in commands.items())
+    parser = ArgumentParser(prog="cp", epilog=epilog,
+                            formatter_class=RawDescriptionHelpFormatter,
+                            description=f'run one of the codepost.io scripts (cp <command> -h for its options); '
+                                        f'several commands separated by {separator} run one after another in one '
+                                        f'process')
+    parser.add_argument("command", choices=list(commands), metavar="command",
+                        help='''name of the command to run''')
+    parser.add_argument("args", nargs=REMAINDER,
+                        help='''options and arguments for the command''')
+
+    groups = splitCommands(sys.argv[1:] if args is None else args)
+    # check every command name before running any of them
+    parsed = [parser.parse_args(group) for group in groups]
+    for options in parsed:
+        if len(parsed) > 1:
+            print(f"cp {options.command} {' '.join(options.args)}".rstrip())
+        runCommand(options.command, options.args)
+        if len(parsed) > 1:
+            print()
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
@@ -82,40 +82,26 @@ rubric file should contain something like this
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='add a rubric to a codepost.io assignment for a course')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog, description='add a rubric to a codepost.io assignment for a course')
+    CP.addCourseOptions(parser, assignment=False)
     parser.add_argument('-r', '--rubric-file', dest='rubricFile', default=None,
                         help='''name of file containing rubric''')
+    CP.addOptions(parser, workers=None)
 
     parser.add_argument("assignment")
     parser.add_argument("rubricFilename")
 
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        course = options.course
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
-    if options.assignment is None:
-        assignment = input("enter assignment name: ")
-    else:
-        assignment = options.assignment[0]
-
-    CP.init()
+    CP.initFromOptions(options)
     c = CP.course(course)
-    a = c.assignment(options.assignment)
+    a = c.assignment(assignment)
     makeRubric(a, options.rubricFilename)
 
-    print(f"add rubric from {options.rubricFilename} for {options.assignment} in {course}")
+    print(f"add rubric from {options.rubricFilename} for {assignment} in {course}")
 
 # ----------------------------------------------------------------------
 
@@ -17,20 +17,9 @@ def splitGradeText(text: str, sep="\n#####\n"):
     return items
 
 # ----------------------------------------------------------------------
-def main():
-    parser = ArgumentParser(description='download codepost.io comments into rubric grade file')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
-    parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
-                        help='''name of assignment, if no name supplied will try to find directory with coursePrefix
-                        and use directory after it as the assignment name
-                        ''')
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog, description='download codepost.io comments into rubric grade file')
+    CP.addCourseOptions(parser)
     parser.add_argument('-g', '--grade-file', dest='gradeFilename', default='grade.txt',
                         help='''name of file to download comments into''')
     parser.add_argument('-r', '--rubric-file', dest='rubricFilename', default='rubric.txt',
@@ -39,25 +28,20 @@ def main():
                         help='''name of file to download comments into''')
     parser.add_argument('-d', '--directory', dest='oneDirectory', default=None,
                         help='''just download files for the one specified student directory''')
+    CP.addOptions(parser)
     parser.add_argument("files", nargs='+', default=None,
                         help='''files we want to grab comments from''')
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        course = options.course
-
-    if options.assignment is None:
-        _, assignment, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        assignment = options.assignment
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
     files = options.files
 
-    CP.init()
+    CP.initFromOptions(options)
     cpCourse = CP.course(course)
-    cpAssignment = cpCourse.assignment(assignment)
+    # with -d only the student's submission is retrieved
+    student = None if options.oneDirectory is None else FileInfo.filenameForFilePath(options.oneDirectory)
+    cpAssignment = cpCourse.assignment(assignment, student)
 
     print(course, assignment)
 
@@ -70,9 +54,15 @@ def main():
 
     directories = [FileInfo.filenameForFilePath(d) for d in directories]
 
-    for directory in directories:
+    def prefetch(job):
+        _, submission = job
+        if submission is not None:
+            submission.prefetch(files)
+
+    # the worker threads retrieve the next students' files and comments while each student's files are written
+    submissions = [(directory, cpAssignment.submissionForStudent(directory)) for directory in directories]
+    for directory, submission in CP.prefetch(prefetch, submissions):
         print(directory)
-        submission = cpAssignment.submissionForStudent(directory)
         if submission is not None:
             gradeFileInfo = FileInfo(cwd, directory, options.gradeFilename)
             gradeText = gradeFileInfo.contentsOf()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# cpDownloadCourse.py
+# download codepost.io comments into the rubric grade files for every assignment of a course in one process
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from CPAPI import *
+from FileUtils import *
+from cpDownloadRubricAndComments import downloadFeedback
+
+# ----------------------------------------------------------------------
+
+def downloadAssignment(cpCourse: CPCourse, name: str, assignmentDirectory: str, options) -> dict:
+    """
+    download the comments for one assignment saving what it prints so the output of the assignments is not mixed
+    :return: dictionary with the counts from downloadFeedback, the seconds it took, the lines it printed, and
+             the error if it failed
+    """
+    lines = []
+    start = time.perf_counter()
+    try:
+        cpAssignment = cpCourse.assignment(name)
+        result = downloadFeedback(cpAssignment, assignmentDirectory, options.files, options.gradeFilename,
+                                  options.rubricFilename, allSource=options.allSource, force=options.force,
+                                  output=lines.append)
+        result["error"] = None
+    except Exception as e:
+        result = {"students": 0, "written": 0, "unchanged": 0, "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = time.perf_counter() - start
+    result["lines"] = lines
+    return result
+
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog,
+                            description='download codepost.io comments into the rubric grade files for every '
+                                        'assignment of a course (run it in the course directory)')
+    CP.addCourseOptions(parser, assignment=False)
+    parser.add_argument('-a', '--assignments', dest='assignments', nargs='+', default=None,
+                        help='''names of the assignments to download, if none are supplied every assignment of the
+                        course that has a directory in the current directory is downloaded
+                        ''')
+    parser.add_argument('-g', '--grade-file', dest='gradeFilename', default='grade.txt',
+                        help='''name of file to download comments into''')
+    parser.add_argument('-r', '--rubric-file', dest='rubricFilename', default='1rubric.txt',
+                        help='''name of file that has rubric comment''')
+    parser.add_argument('--all-source-files', dest='allSource', action='store_true',
+                        help='''upload all files with .py, .cpp, .hpp, .h, .swift extension''')
+    parser.add_argument('--force', dest='force', action='store_true',
+                        help='''write the files even if the comments have not changed since they were downloaded''')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=4,
+                        help='''number of assignments to download at the same time''')
+    parser.add_argument('-q', '--quiet', dest='quiet', action='store_true',
+                        help='''only print the summary of each assignment instead of every student's grade''')
+    CP.addOptions(parser, workers=8,
+                  workersHelp='''number of threads to use for retrieving files and comments from codepost.io (also
+                  the most requests in progress at once across all the assignments)''')
+    parser.add_argument("files", nargs='*', default=None,
+                        help='''files we want to grab comments from''')
+
+    options = parser.parse_args(args)
+    course, _ = CP.courseAndAssignment(options)
+
+    # one session, cache, and rate limiter for all the assignments; the session's pool of workers connections
+    # limits the number of requests in progress across all of them
+    CP.initFromOptions(options)
+    cpCourse = CP.course(course)
+
+    cwd = os.getcwd()
+    directoryInfo = DirectoryInfo(cwd)
+    if options.assignments is not None:
+        assignments = options.assignments
+    else:
+        directories = set(FileInfo.filenameForFilePath(d) for d in directoryInfo.directories())
+        assignments = [name for name in cpCourse.assignmentNames() if name in directories]
+
+    print(course, " ".join(assignments))
+    print()
+
+    start = time.perf_counter()
+    requestsBefore = CP.connectionStats()["requests"]
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, options.jobs)) as executor:
+        futures = {executor.submit(downloadAssignment, cpCourse, name, os.path.join(cwd, name), options): name
+                   for name in assignments}
+        for future in as_completed(futures):
+            name = futures[future]
+            result = future.result()
+            results[name] = result
+            if not options.quiet:
+                print(name)
+                for line in result["lines"]:
+                    print(line)
+            if result["error"] is not None:
+                print(f"{name}: failed: {result['error']}")
+            else:
+                print(f"{name}: {result['students']} students, {result['written']} written, "
+                      f"{result['unchanged']} unchanged in {result['seconds']:0.1f} seconds")
+            print()
+    elapsed = time.perf_counter() - start
+
+    width = max([len("assignment")] + [len(name) for name in assignments])
+    print(f"{'assignment':{width}s} {'students':>8s} {'written':>8s} {'unchanged':>9s} {'seconds':>8s}")
+    for name in assignments:
+        r = results[name]
+        status = "" if r["error"] is None else "  (failed)"
+        print(f"{name:{width}s} {r['students']:8d} {r['written']:8d} {r['unchanged']:9d} {r['seconds']:8.1f}{status}")
+    totalSeconds = sum(r["seconds"] for r in results.values())
+    print(f"{'total':{width}s} {sum(r['students'] for r in results.values()):8d} "
+          f"{sum(r['written'] for r in results.values()):8d} {sum(r['unchanged'] for r in results.values()):9d} "
+          f"{totalSeconds:8.1f}")
+    print(f"{elapsed:0.1f} seconds for {len(assignments)} assignments ({options.jobs} at a time) with "
+          f"{CP.connectionStats()['requests'] - requestsBefore} requests")
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
@@ -8,78 +8,59 @@
 
 
 from argparse import ArgumentParser
+import time
 from CPAPI import *
+from CPFeedback import CPFeedback
+from CPSnapshot import CPSnapshot
 from FileUtils import *
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='download codepost.io comments into rubric grade file')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
-    parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
-                        help='''name of assignment, if no name supplied will try to find directory with coursePrefix
-                        and use directory after it as the assignment name
-                        ''')
-    parser.add_argument('-g', '--grade-file', dest='gradeFilename', default='grade.txt',
-                        help='''name of file to download comments into''')
-    parser.add_argument('-r', '--rubric-file', dest='rubricFilename', default='1rubric.txt',
-                        help='''name of file that has rubric comment''')
-    parser.add_argument('--text-file', dest='commentFilename', default='comments.txt',
-                        help='''name of file to download comments into''')
-    parser.add_argument('-d', '--directory', dest='oneDirectory', default=None,
-                        help='''just download files for the one specified student directory''')
-    parser.add_argument('--all-source-files', dest='allSource', action='store_true',
-                        help='''upload all files with .py, .cpp, .hpp, .h, .swift extension''')
-    parser.add_argument("files", nargs='*', default=None,
-                        help='''files we want to grab comments from''')
-
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        course = options.course
-
-    if options.assignment is None:
-        _, assignment, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        assignment = options.assignment
-
-    files = options.files
-
-    CP.init()
-    cpCourse = CP.course(course)
-    cpAssignment = cpCourse.assignment(assignment)
-
-    print(course, assignment)
-
-    sourceExtensions = set((".py", ".cpp", ".hpp", ".swift", ".java", ".c", ".h", ".txt"))
-
-    cwd = os.getcwd()
-    if options.oneDirectory is not None:
-        directories = [options.oneDirectory]
+# extensions of the files whose comments are downloaded with --all-source-files
+sourceExtensions = set((".py", ".cpp", ".hpp", ".swift", ".java", ".c", ".h", ".txt"))
+
+def downloadFeedback(cpAssignment: CPAssignment, assignmentDirectory: str, files: List[str], gradeFilename: str,
+                     rubricFilename: str, allSource: bool = False, force: bool = False, oneDirectory: str = None,
+                     students: Iterable[str] = None, output: Callable[[str], None] = print) -> dict:
+    """
+    write the rubric comments for each student directory in the assignment directory to its grade and rubric files
+    :param cpAssignment: assignment to download the comments for
+    :param assignmentDirectory: path of the assignment directory (the directory containing the student directories)
+    :param files: files to download the comments for
+    :param gradeFilename: name of the file in each student directory to put the feedback at the start of
+    :param rubricFilename: name of the file in each student directory to write the feedback to
+    :param allSource: if True, also download the comments for all the source files in each student directory
+    :param force: if True, write the files even if the comments have not changed since they were downloaded
+    :param oneDirectory: if not None, just download the comments for this student directory
+    :param students: if not None, just download the comments for the directories of these students
+    :param output: function called with each line to print
+    :return: dictionary with the number of students, students whose files were written, and students whose comments
+             were unchanged
+    """
+    counts = {"students": 0, "written": 0, "unchanged": 0}
+    if oneDirectory is not None:
+        directoryInfo = DirectoryInfo(assignmentDirectory)
+        directories = [oneDirectory]
+    elif students is not None:
+        directoryInfo = DirectoryInfo(assignmentDirectory)
+        students = set(students)
+        directories = [d for d in directoryInfo.directories() if FileInfo.filenameForFilePath(d) in students]
     else:
-        directoryInfo = DirectoryInfo(cwd)
+        # scan the assignment directory and all the student directories at once
+        directoryInfo = DirectoryInfo.forAssignment(assignmentDirectory)
         directories = directoryInfo.directories()
 
     directories = [FileInfo.filenameForFilePath(d) for d in directories]
 
+    toDownload = []
     for directory in sorted(directories):
         submission = cpAssignment.submissionForStudent(directory)
         if submission is not None:
-            gradeFileInfo = FileInfo(cwd, directory, options.gradeFilename)
-            gradeText = gradeFileInfo.contentsOf()
             # download rubric comments for files
-            if options.allSource:
+            if allSource:
                 filesToDownload = files[:]
                 # get files in the student directory
-                studentDirectory = DirectoryInfo(cwd, directory)
+                studentDirectory = directoryInfo.subdirectory(directory)
                 studentFiles = studentDirectory.files()
                 for f in studentFiles:
                     info = FileInfo(f)
@@ -87,19 +68,133 @@ def main():
                         filesToDownload.append(info.fileName())
             else:
                 filesToDownload = files
+            toDownload.append((directory, submission, filesToDownload))
+
+    # load the rubric once before the worker threads need it
+    cpAssignment.rubricCategories()
+    # the worker threads retrieve the next students' files and comments while each student's files are written
+    for directory, submission, filesToDownload in CP.prefetch(lambda job: job[1].prefetch(job[2]), toDownload):
+        counts["students"] += 1
+        gradeFileInfo = FileInfo(assignmentDirectory, directory, gradeFilename)
+
+        # skip students whose comments have not changed since their feedback was written
+        fingerprint = submission.commentFingerprint(filesToDownload, cpAssignment)
+        oldFingerprint = CPFeedback.fingerprint(gradeFileInfo)
+        rubricFileInfo = FileInfo(assignmentDirectory, directory, rubricFilename)
+        if not force and fingerprint == oldFingerprint and rubricFileInfo.exists():
+            score = next(rubricFileInfo.lines(), "").strip()
+            output(f"{directory}: {score} (unchanged)")
+            counts["unchanged"] += 1
+            submission.releaseCode()
+            continue
+
+        # stream the rubric comments into both files, replacing any feedback previously written to the grade file
+        score = None
+        with AtomicWriter(rubricFileInfo.filePath()) as rubricFile, \
+                AtomicWriter(gradeFileInfo.filePath()) as gradeFile:
+            for text in submission.rubricFeedback(filesToDownload, cpAssignment):
+                if score is None:
+                    score = text.split("\n", 1)[0].strip()
+                rubricFile.write(text)
+                gradeFile.write(text)
+            gradeFile.write(CPFeedback.endLine(fingerprint))
+            for line in CPFeedback.linesWithoutFeedback(gradeFileInfo.lines(), oldFingerprint is not None):
+                gradeFile.write(line)
+        output(f"{directory}: {score}")
+        counts["written"] += 1
+        # the files' code is not needed again so do not keep every student's code in memory
+        submission.releaseCode()
+    return counts
+
+def syncFeedback(cpAssignment: CPAssignment, assignmentDirectory: str, files: List[str], options,
+                 student: str = None) -> None:
+    """
+    check the assignment's submissions every options.sync seconds until control-C is pressed and download the
+    comments again for the students whose submissions were edited (listing the submissions is one request and only
+    the edited submissions' files and comments are retrieved again)
+    :param cpAssignment: assignment to download the comments for
+    :param assignmentDirectory: path of the assignment directory (the directory containing the student directories)
+    :param files: files to download the comments for
+    :param options: command line options
+    :param student: if not None, only check this student's submission
+    """
+    print()
+    print(f"checking for edited submissions every {options.sync:g} seconds, press control-C to stop")
+    try:
+        while True:
+            time.sleep(options.sync)
+            changed = cpAssignment.refreshSubmissions(student)
+            if len(changed) == 0:
+                continue
+            print(time.strftime("%H:%M:%S"), f"{len(changed)} edited submissions")
+            downloadFeedback(cpAssignment, assignmentDirectory, files, options.gradeFilename, options.rubricFilename,
+                             allSource=options.allSource, force=options.force, oneDirectory=options.oneDirectory,
+                             students=changed)
+            print()
+    except KeyboardInterrupt:
+        print("stopped syncing")
 
+# ----------------------------------------------------------------------
 
-            rubricText = submission.rubricCommentsByFile(filesToDownload, cpAssignment)
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog, description='download codepost.io comments into rubric grade file')
+    CP.addCourseOptions(parser)
+    parser.add_argument('-g', '--grade-file', dest='gradeFilename', default='grade.txt',
+                        help='''name of file to download comments into''')
+    parser.add_argument('-r', '--rubric-file', dest='rubricFilename', default='1rubric.txt',
+                        help='''name of file that has rubric comment''')
+    parser.add_argument('--text-file', dest='commentFilename', default='comments.txt',
+                        help='''name of file to download comments into''')
+    parser.add_argument('-d', '--directory', dest='oneDirectory', default=None,
+                        help='''just download files for the one specified student directory''')
+    parser.add_argument('--all-source-files', dest='allSource', action='store_true',
+                        help='''upload all files with .py, .cpp, .hpp, .h, .swift extension''')
+    parser.add_argument('--force', dest='force', action='store_true',
+                        help='''write the files even if the comments have not changed since they were downloaded''')
+    parser.add_argument('--offline', dest='offline', action='store_true',
+                        help=f'''render the feedback from the snapshot made by cpSnapshot.py ({CPSnapshot.filename}
+                        in the current directory) without connecting to codepost.io''')
+    parser.add_argument('--snapshot', dest='snapshot', default=None,
+                        help='''render the feedback from this snapshot file made by cpSnapshot.py''')
+    parser.add_argument('--sync', dest='sync', type=float, default=None, metavar='SECONDS',
+                        help='''after downloading, keep running and check for edited submissions every SECONDS
+                        seconds, downloading the comments again for just those students''')
+    CP.addOptions(parser)
+    parser.add_argument("files", nargs='*', default=None,
+                        help='''files we want to grab comments from''')
+
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
-            # create string with rubric comment and any existing text in the grade file
-            s = f"{rubricText}\n\n{gradeText}"
-            gradeFileInfo.writeTo(s)
+    files = options.files
+
+    if options.offline and options.snapshot is None:
+        options.snapshot = CPSnapshot.defaultPath(os.getcwd())
+    if options.snapshot is not None and options.sync is not None:
+        print("--sync needs codepost.io so it cannot be used with a snapshot")
+        return
+    if options.snapshot is not None:
+        # everything comes from the snapshot so codepost.io is not used at all
+        snapshot = CPSnapshot(options.snapshot)
+        if (snapshot.course(), snapshot.assignmentName()) != (course, assignment):
+            print(f"{snapshot} is a snapshot of {snapshot.course()} {snapshot.assignmentName()}")
+            return
+        print(f"using snapshot {snapshot} made {time.ctime(snapshot.savedTime())}")
+        cpAssignment = snapshot.assignment()
+    else:
+        CP.initFromOptions(options)
+        cpCourse = CP.course(course)
+        # with -d only the student's submission is retrieved
+        student = None if options.oneDirectory is None else FileInfo.filenameForFilePath(options.oneDirectory)
+        cpAssignment = cpCourse.assignment(assignment, student)
+
+    print(course, assignment)
 
-            rubricFileInfo = FileInfo(cwd, directory, options.rubricFilename)
-            rubricFileInfo.writeTo(rubricText)
-            score = rubricText.split("\n")[0].strip()
-            print(f"{directory}: {score}")
+    downloadFeedback(cpAssignment, os.getcwd(), files, options.gradeFilename, options.rubricFilename,
+                     allSource=options.allSource, force=options.force, oneDirectory=options.oneDirectory)
 
+    if options.sync is not None:
+        syncFeedback(cpAssignment, os.getcwd(), files, options, student)
 
 # ----------------------------------------------------------------------
 
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# cpGradebook.py
+# export the grades of every student in a codepost.io assignment to a CSV gradebook
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+from CPAPI import *
+from CPGradebook import CPGradebook
+from CPSnapshot import CPSnapshot
+from FileUtils import *
+
+# ----------------------------------------------------------------------
+
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog,
+                            description='export the grade and score in each rubric category of every student to a CSV '
+                                        'gradebook and print statistics for each rubric category')
+    CP.addCourseOptions(parser)
+    parser.add_argument('-o', '--output', dest='output', default=None,
+                        help='''path of the CSV gradebook (defaults to <assignment>-grades.csv in the current
+                        directory)''')
+    parser.add_argument('--statistics-file', dest='statisticsFile', default=None,
+                        help='''also write the statistics for each rubric category to this CSV file''')
+    parser.add_argument('--offline', dest='offline', action='store_true',
+                        help=f'''use the snapshot made by cpSnapshot.py ({CPSnapshot.filename} in the current
+                        directory) without connecting to codepost.io''')
+    parser.add_argument('--snapshot', dest='snapshot', default=None,
+                        help='''use this snapshot file made by cpSnapshot.py''')
+    parser.add_argument('--all-files', dest='allFiles', action='store_true',
+                        help='''use the comments on all the files in each submission instead of the files supplied''')
+    CP.addOptions(parser)
+    parser.add_argument("files", nargs='*', default=None,
+                        help='''files to use the comments from (the same as for cpDownloadRubricAndComments.py so the
+                        grades match the rubric files); the comments on 1output.txt are always used''')
+
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
+
+    if options.offline and options.snapshot is None:
+        options.snapshot = CPSnapshot.defaultPath(os.getcwd())
+    if options.snapshot is not None:
+        snapshot = CPSnapshot(options.snapshot)
+        if (snapshot.course(), snapshot.assignmentName()) != (course, assignment):
+            print(f"{snapshot} is a snapshot of {snapshot.course()} {snapshot.assignmentName()}")
+            return
+        cpAssignment = snapshot.assignment()
+    else:
+        CP.initFromOptions(options)
+        cpCourse = CP.course(course)
+        cpAssignment = cpCourse.assignment(assignment)
+
+    print(course, assignment)
+
+    path = options.output if options.output is not None else os.path.join(os.getcwd(), f"{assignment}-grades.csv")
+    gradebook = CPGradebook(cpAssignment, None if options.allFiles else options.files)
+    gradebook.writeCSV(path)
+    if options.statisticsFile is not None:
+        gradebook.writeStatisticsCSV(options.statisticsFile)
+
+    print(f"wrote the grades of {len(gradebook.students())} students to {path}")
+    print()
+    print(gradebook.statisticsTable())
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
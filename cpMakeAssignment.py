@@ -13,19 +13,13 @@ from cpAddRubric import makeRubric
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='make a codepost.io assignment for a course')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog, description='make a codepost.io assignment for a course')
+    CP.addCourseOptions(parser, assignment=False)
 
     parser.add_argument('-p', '--points', dest='points', default=100,
                         help='''number of points for assignment, defaults to 100''')
+    CP.addOptions(parser, workers=None)
 
     parser.add_argument("assignment",
                         help='''name of assignment to create''')
@@ -33,20 +27,12 @@ def main():
     parser.add_argument("rubricFilename", nargs='?', default=None,
                         help='''name of file containing rubric to add to the assignment''')
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        course = options.course
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
-    if options.assignment is None:
-        assignment = input("enter assignment name: ")
-    else:
-        assignment = options.assignment
+    print(f"make assignment {assignment} for {course}")
 
-    print(f"make assignment {options.assignment} for {course}")
-
-    CP.init()
+    CP.initFromOptions(options)
     c = CP.course(course)
     a = c.makeAssignment(assignment, options.points)
     if options.rubricFilename is not None:
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# ----------------------------------------------------------------------
+# cpSnapshot.py
+# save a codepost.io assignment (submissions, files, comments, and rubric) to a local snapshot file
+# ----------------------------------------------------------------------
+
+from argparse import ArgumentParser
+import time
+from CPAPI import *
+from CPSnapshot import CPSnapshot
+from FileUtils import *
+
+# ----------------------------------------------------------------------
+
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog,
+                            description='save a codepost.io assignment to a local snapshot file so feedback can be '
+                                        'rendered without connecting to codepost.io')
+    CP.addCourseOptions(parser)
+    parser.add_argument('-o', '--output', dest='output', default=None,
+                        help=f'''path of the snapshot file (defaults to {CPSnapshot.filename} in the current
+                        directory)''')
+    CP.addOptions(parser)
+
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
+
+    path = options.output if options.output is not None else CPSnapshot.defaultPath(os.getcwd())
+
+    CP.initFromOptions(options)
+    cpCourse = CP.course(course)
+    cpAssignment = cpCourse.assignment(assignment)
+
+    print(course, assignment)
+
+    start = time.time()
+    counts = CPSnapshot.save(path, course, assignment, cpAssignment)
+    print(f"saved {counts['submissions']} submissions, {counts['files']} files, and {counts['comments']} comments "
+          f"to {path} in {time.time() - start:0.1f} seconds")
+
+# ----------------------------------------------------------------------
+
+if __name__ == '__main__':
+    main()
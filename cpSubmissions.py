@@ -13,57 +13,45 @@ from FileUtils import *
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='download codepost.io submitted files')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
-    parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
-                        help='''name of assignment, if no name supplied will try to find directory with coursePrefix
-                        and use directory after it as the assignment name
-                        ''')
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog, description='download codepost.io submitted files')
+    CP.addCourseOptions(parser)
     parser.add_argument('-d', '--directory', dest='oneDirectory', default=None,
                         help='''just download files for the one specified student email''')
+    CP.addOptions(parser)
 
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        course = options.course
-
-    if options.assignment is None:
-        _, assignment, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        assignment = options.assignment
-
-    CP.init()
+    CP.initFromOptions(options)
     cpCourse = CP.course(course)
-    cpAssignment = cpCourse.assignment(assignment)
+    # with -d only the student's submission is retrieved
+    student = None if options.oneDirectory is None else FileInfo.filenameForFilePath(options.oneDirectory)
+    cpAssignment = cpCourse.assignment(assignment, student)
 
     print(course, assignment)
 
     cwd = os.getcwd()
-    submissions = cpAssignment.submissions()
 
     if options.oneDirectory is not None:
         directories = [options.oneDirectory]
     else:
-        directories = [s.firstStudent() for s in submissions]
+        directories = cpAssignment.students()
 
 
     directories = [FileInfo.filenameForFilePath(d) for d in directories]
 
-    for directory in sorted(directories):
+    def prefetch(job):
+        _, submission = job
+        if submission is not None:
+            submission.prefetch(comments=False)
+
+    # the worker threads retrieve the next students' files while each student's files are written
+    submissions = [(directory, cpAssignment.submissionForStudent(directory)) for directory in sorted(directories)]
+    for directory, submission in CP.prefetch(prefetch, submissions):
         dirPath = FileInfo(cwd, directory)
         if not dirPath.exists():
             os.mkdir(dirPath.filePath())
-        submission = cpAssignment.submissionForStudent(directory)
         if submission is not None:
             files = submission.files()
             print(directory)
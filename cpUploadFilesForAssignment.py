@@ -7,25 +7,183 @@
 # ----------------------------------------------------------------------
 
 from argparse import ArgumentParser
+from queue import Queue
+import threading
+import time
 from CPAPI import *
+from CPFeedback import CPFeedback
 from FileUtils import *
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='upload specified files to a codepost.io assignment for student directories')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
-    parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
-                        help='''name of assignment, if no name supplied will try to find directory with coursePrefix
-                        and use directory after it as the assignment name
-                        ''')
+def readStudentFiles(directoryInfo: DirectoryInfo, directory, files, options, sourceExtensions):
+    """
+    read the files to upload for one student directory
+    :param directoryInfo: directory containing the student directories
+    :param directory: student directory (named by the student's email address)
+    :param files: names of the files to upload
+    :param options: command line options
+    :param sourceExtensions: extensions of the files to upload when options.allSource is set
+    :return: tuple of student email, list of (filename, path, contents) to upload, and the test output text (None if
+             not uploading it) or None if the student directory has no files
+    """
+    cwd = str(directoryInfo)
+    # get the last part of path which is the email address
+    studentEmail = FileInfo.filenameForFilePath(directory)
+
+    # get files in the student directory
+    studentDirectory = directoryInfo.subdirectory(directory, recursive=options.recursive)
+    studentFiles = studentDirectory.files()
+
+    # if we do not have any files
+    if len(studentFiles) == 0:
+        return None
+
+    if options.allSource:
+        filesToUpload = files[:]
+        for f in studentFiles:
+            info = FileInfo(f)
+            if info.extension() in sourceExtensions:
+                # files in subdirectories are uploaded with their path relative to the student directory
+                filesToUpload.append(os.path.relpath(f, str(studentDirectory)))
+    else:
+        filesToUpload = files
+
+    # with --recursive a named file that is not at the top of the student directory is found by its name in the
+    # subdirectories (the least deeply nested one if there are several)
+    pathsByName = {}
+    if options.recursive:
+        for path in sorted(studentFiles, key=lambda p: (p.count(os.sep), p)):
+            pathsByName.setdefault(os.path.basename(path), path)
+
+    uploads = []
+    for f in filesToUpload:
+        info = FileInfo(cwd, studentEmail, f)
+        if info.filePath() not in studentFiles and f in pathsByName:
+            info = FileInfo(pathsByName[f])
+        if info.filePath() in studentFiles:
+            text = info.contentsOf("utf8" if options.utf8 else "ascii")
+            if text != "":
+                uploads.append((f, info.filePath(), text))
+
+    # upload the result of running my tests
+    # my test scripts put output in grade.txt
+    # upload that as 1output.txt so first in codepost file list
+    # (without the feedback cpDownloadRubricAndComments.py puts at the start of it so the lines the comments on
+    # 1output.txt refer to do not move and downloading the feedback does not change 1output.txt)
+    outputText = None
+    if not options.noTestOutput:
+        gradeFile = FileInfo(cwd, studentEmail, options.gradeFilename)
+        outputText = CPFeedback.withoutFeedback(gradeFile.contentsOf("utf8" if options.utf8 else "ascii"))
+        if outputText == "":
+            outputText = "test output\n"
+
+    return studentEmail, uploads, outputText
+
+def uploadStudentFiles(cpAssignment: CPAssignment, studentEmail: str, uploads, outputText, overwrite: bool,
+                       manifest: CPManifest = None, reportOutput: bool = False):
+    """
+    upload one student's files in order (the submission must already exist, see CPAssignment.reconcileStudents)
+    :param cpAssignment: assignment to upload the files to
+    :param studentEmail: email address of the student
+    :param uploads: list of (filename, path, contents) to upload
+    :param outputText: text to upload as 1output.txt (or None to not upload it)
+    :param overwrite: if True, overwrite files that already exist
+    :param manifest: manifest of uploaded files used to skip files that have not changed
+    :param reportOutput: if True, include a line for 1output.txt when it is uploaded
+    :return: list of lines describing what was uploaded
+    """
+    lines = [studentEmail]
+    # get the submission (a partner's directory uploads to the submission the student shares)
+    submission = cpAssignment.submissionForStudent(studentEmail)
+    if submission is None:
+        raise ValueError(f"{studentEmail} does not have a submission")
+
+    for f, path, text in uploads:
+        # files that have not changed since they were uploaded are skipped without retrieving the submission's files
+        if manifest is not None and submission.isUploaded(f, text, manifest):
+            continue
+        fileExists = submission.fileWithName(f)
+        if overwrite or not fileExists:
+            if submission.uploadFile(f, text, overwrite=overwrite, manifest=manifest):
+                lines.append(f"upload {path}")
+
+    if outputText is not None:
+        if submission.uploadFile('1output.txt', outputText, overwrite=overwrite, manifest=manifest) and reportOutput:
+            lines.append("upload 1output.txt")
+    return lines
+
+def watchStudentFiles(cpAssignment: CPAssignment, cwd: str, files, options, sourceExtensions, manifest: CPManifest):
+    """
+    upload the files of the student directories again each time they are written until control-C is pressed
+    only the files that were written (and are ones that would be uploaded) are uploaded, overwriting the files on
+    codepost.io, and a burst of writes (such as a test script rewriting several files) is uploaded once it stops
+    :param cpAssignment: assignment to upload the files to
+    :param cwd: assignment directory containing the student directories
+    :param files: names of the files to upload
+    :param options: command line options
+    :param sourceExtensions: extensions of the files to upload when options.allSource is set
+    :param manifest: manifest of uploaded files used to skip files whose contents did not change
+    """
+    watcher = DirectoryWatcher(cwd, recursive=options.recursive, pollInterval=options.pollInterval,
+                               usePolling=options.poll)
+    print(f"watching the student directories in {cwd} for changes ({watcher.backend}), press control-C to stop")
+    print()
+    oneStudent = None if options.oneDirectory is None else FileInfo.filenameForFilePath(options.oneDirectory)
+
+    def uploadChanged(job):
+        studentEmail, uploads, outputText = job
+        try:
+            return uploadStudentFiles(cpAssignment, studentEmail, uploads, outputText, True, manifest,
+                                      reportOutput=True)
+        except Exception as e:
+            return [studentEmail, f"error uploading files for {studentEmail}: {e}"]
+
+    try:
+        for changed in watcher.changes(debounce=options.debounce):
+            # the paths that were written by student directory
+            written = {}
+            for path in changed:
+                directory = os.path.relpath(path, cwd).split(os.sep)[0]
+                if "@" in directory and (oneStudent is None or directory == oneStudent):
+                    written.setdefault(directory, set()).add(path)
+
+            # scan the directories again since files may have been added
+            directoryInfo = DirectoryInfo(cwd)
+            jobs = []
+            for directory in sorted(written):
+                job = readStudentFiles(directoryInfo, directory, files, options, sourceExtensions)
+                if job is None:
+                    continue
+                studentEmail, uploads, outputText = job
+                uploads = [u for u in uploads if u[1] in written[directory]]
+                if FileInfo(cwd, studentEmail, options.gradeFilename).filePath() not in written[directory]:
+                    outputText = None
+                if len(uploads) > 0 or outputText is not None:
+                    jobs.append((studentEmail, uploads, outputText))
+
+            # create the submissions of students whose directories were added while watching
+            reconciled = cpAssignment.reconcileStudents(job[0] for job in jobs)
+            for studentEmail, error in reconciled["failed"].items():
+                print(f"unable to create a submission for {studentEmail}: {error}")
+            jobs = [job for job in jobs if job[0] not in reconciled["failed"]]
+
+            for lines in CP.map(uploadChanged, jobs):
+                if len(lines) > 1:
+                    print(time.strftime("%H:%M:%S"), "\n".join(lines))
+                    print()
+            manifest.save()
+    except KeyboardInterrupt:
+        print("stopped watching")
+    finally:
+        watcher.close()
+
+# ----------------------------------------------------------------------
+
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog,
+                            description='upload specified files to a codepost.io assignment for student directories')
+    CP.addCourseOptions(parser)
     parser.add_argument('-d','--directory', dest='oneDirectory', default=None,
                         help='''just upload files for the one specified student directory''')
     parser.add_argument('-g', '--grade-file', dest='gradeFilename', default='grade.txt',
@@ -39,26 +197,35 @@ def main():
 
     parser.add_argument('--all-source-files', dest='allSource', action='store_true',
                         help='''upload all files with .py, .cpp, .hpp, .h, .swift extension''')
+    parser.add_argument('--recursive', dest='recursive', action='store_true',
+                        help='''also look for the files in subdirectories of the student directories''')
+    parser.add_argument('--utf8', dest='utf8', action='store_true',
+                        help='''upload files as UTF-8 instead of removing any characters that are not ASCII''')
+    parser.add_argument('--watch', dest='watch', action='store_true',
+                        help='''after uploading, keep running and upload the files of a student directory again
+                        (overwriting them) whenever they are written, such as by a test script rewriting grade.txt''')
+    parser.add_argument('--debounce', dest='debounce', type=float, default=2.0,
+                        help='''with --watch, number of seconds without any files being written before the written
+                        files are uploaded''')
+    parser.add_argument('--poll', dest='poll', action='store_true',
+                        help='''with --watch, check the modification times of the files instead of using inotify''')
+    parser.add_argument('--poll-interval', dest='pollInterval', type=float, default=1.0,
+                        help='''with --watch, number of seconds between checks of the files when not using inotify''')
+    CP.addOptions(parser, workersHelp='''number of students to upload files for at the same time''')
 
     parser.add_argument("files", nargs='*', default=None,
                         help='''list of files (separated by spaces) to upload''')
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd(), options.coursePrefix)
-    else:
-        course = options.course
-
-    if options.assignment is None:
-        _, assignment, _, _ = FileInfo.infoForFilePath(os.getcwd(), options.coursePrefix)
-    else:
-        assignment = options.assignment
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
     files = options.files
 
-    CP.init()
+    CP.initFromOptions(options)
     cpCourse = CP.course(course)
-    cpAssignment = cpCourse.assignment(assignment)
+    # with -d only the student's submission is retrieved
+    student = None if options.oneDirectory is None else FileInfo.filenameForFilePath(options.oneDirectory)
+    cpAssignment = cpCourse.assignment(assignment, student)
 
     print(course, assignment)
 
@@ -66,60 +233,80 @@ def main():
 
     cwd = os.getcwd()
     if options.oneDirectory is not None:
+        directoryInfo = DirectoryInfo(cwd)
         directories = [options.oneDirectory]
     else:
-        directoryInfo = DirectoryInfo(cwd)
+        # scan the assignment directory and all the student directories at once
+        directoryInfo = DirectoryInfo.forAssignment(cwd, recursive=options.recursive)
         directories = directoryInfo.directories()
 
-    for directory in directories:
-        # if it appears to be a directory with an email address name
-        if "@" in directory:
-            print(directory)
-            # get the last part of path which is the email address
-            studentEmail = FileInfo.filenameForFilePath(directory)
-
-            # get files in the student directory
-            studentDirectory = DirectoryInfo(cwd, directory)
-            studentFiles = studentDirectory.files()
-
-            # if we have some files
-            if len(studentFiles) != 0:
-                # get the submission
-                submission = cpAssignment.submissionForStudent(studentEmail)
-                # create submission for student if it does not exist
-                if submission is None:
-                    submission = cpAssignment.makeSubmissionForStudent(studentEmail)
-
-                if options.allSource:
-                    filesToUpload = files[:]
-                    for f in studentFiles:
-                        info = FileInfo(f)
-                        if info.extension() in sourceExtensions:
-                            filesToUpload.append(info.fileName())
-                else:
-                    filesToUpload = files
-
-
-                for f in filesToUpload:
-                    info = FileInfo(cwd, studentEmail, f)
-                    if info.filePath() in studentFiles:
-                        text = info.contentsOf()
-                        if text != "":
-                            fileExists = submission.fileWithName(f)
-                            if options.overwrite or not fileExists:
-                                print(f"upload {info.filePath()}")
-                                submission.uploadFile(f, text, overwrite=options.overwrite)
-
-                # upload the result of running my tests
-                # my test scripts put output in grade.txt
-                # upload that as 1output.txt so first in codepost file list
-                if not options.noTestOutput:
-                    gradeFile = FileInfo(cwd, studentEmail, options.gradeFilename)
-                    text = gradeFile.contentsOf()
-                    if text == "":
-                        text = "test output\n"
-                    submission.uploadFile('1output.txt', text, overwrite=options.overwrite)
-            print()
+    manifest = CPManifest(cwd, assignment)
+
+    # create every missing submission up front (in parallel with -w) so the upload threads only upload files
+    studentEmails = [FileInfo.filenameForFilePath(d) for d in directories
+                     if "@" in d and len(directoryInfo.subdirectory(d, recursive=options.recursive).files()) > 0]
+    reconciled = cpAssignment.reconcileStudents(studentEmails)
+    created = [s for s in reconciled["localOnly"] if s not in reconciled["failed"]]
+    if len(created) > 0:
+        print(f"created submissions for {len(created)} students only in local directories: {' '.join(created)}")
+    for studentEmail, error in reconciled["failed"].items():
+        print(f"unable to create a submission for {studentEmail}: {error}")
+    if options.oneDirectory is None and len(reconciled["remoteOnly"]) > 0:
+        print(f"{len(reconciled['remoteOnly'])} students with submissions but no local directory: "
+              f"{' '.join(reconciled['remoteOnly'])}")
+    if len(reconciled["localOnly"]) > 0 or len(reconciled["remoteOnly"]) > 0:
+        print()
+
+    # read the files for each student in this thread while the worker threads upload them
+    jobs = Queue(maxsize=2 * CP.workers)
+    printLock = threading.Lock()
+    errors = []
+
+    def uploadWorker():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            studentEmail, uploads, outputText = job
+            try:
+                lines = uploadStudentFiles(cpAssignment, studentEmail, uploads, outputText, options.overwrite, manifest)
+            except Exception as e:
+                lines = [studentEmail, f"error uploading files for {studentEmail}: {e}"]
+                errors.append(studentEmail)
+            # print all the output for a student together so it is not interleaved with other students
+            with printLock:
+                print("\n".join(lines))
+                print()
+
+    workers = [threading.Thread(target=uploadWorker) for _ in range(CP.workers)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for directory in directories:
+            # if it appears to be a directory with an email address name
+            if "@" in directory:
+                if FileInfo.filenameForFilePath(directory) in reconciled["failed"]:
+                    errors.append(FileInfo.filenameForFilePath(directory))
+                    continue
+                job = readStudentFiles(directoryInfo, directory, files, options, sourceExtensions)
+                if job is not None:
+                    jobs.put(job)
+    finally:
+        # stop the upload threads even if reading the files is interrupted (such as by control-C) so the script exits
+        # and the uploads that finished are recorded in the manifest
+        for _ in workers:
+            jobs.put(None)
+        for worker in workers:
+            worker.join()
+        manifest.save()
+
+    if len(errors) != 0:
+        print(f"unable to upload files for: {' '.join(sorted(errors))}")
+
+    if options.watch:
+        print()
+        watchStudentFiles(cpAssignment, cwd, files, options, sourceExtensions, manifest)
 
 # ----------------------------------------------------------------------
 
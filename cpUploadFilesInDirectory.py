@@ -12,47 +12,31 @@ from FileUtils import *
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='upload specified files to codepost.io')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
-    parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
-                        help='''name of assignment, if no name supplied will try to find directory with coursePrefix
-                        and use directory after it as the assignment name
-                        ''')
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog, description='upload specified files to codepost.io')
+    CP.addCourseOptions(parser)
     parser.add_argument('--rename', dest='rename', action='store_true',
                         help='''rename files so arguments are: file1 renamedFile1 file2 renamedFile2''')
     parser.add_argument('--overwrite', dest='overwrite', action='store_true',
                         help='''overwrite files if already exist''')
+    parser.add_argument('--utf8', dest='utf8', action='store_true',
+                        help='''upload files as UTF-8 instead of removing any characters that are not ASCII''')
+    CP.addOptions(parser, workers=None)
 
     parser.add_argument("files", nargs='+', default=None)
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        course = options.course
-
-    if options.assignment is None:
-        _, assignment, _ = FileInfo.infoForFilePath(os.getcwd())
-    else:
-        assignment = options.assignment
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
     files = options.files
 
-    CP.init()
+    CP.initFromOptions(options)
     cpCourse = CP.course(course)
     cpAssignment = cpCourse.assignment(assignment)
 
 
     cwd = os.getcwd()
-    _, _, studentEmail = FileInfo.infoForFilePath(cwd)
+    _, _, studentEmail = FileInfo.infoForFilePath(cwd, options.coursePrefix)
     if "@" not in studentEmail:
         print(f"{studentEmail} does not appear to be a student directory as no @ sign")
         return
@@ -70,24 +54,31 @@ def main():
         if submission is None:
             submission = cpAssignment.makeSubmissionForStudent(studentEmail)
 
+        # the manifest of uploaded files is kept in the assignment directory
+        manifest = CPManifest(os.path.dirname(cwd), assignment)
         if options.rename:
             files = tuple(zip(*(iter(files),) * 2))
             for f, renamedF in files:
                 info = FileInfo(cwd, f)
                 if info.filePath() in studentFiles:
-                    text = info.contentsOf()
+                    text = info.contentsOf("utf8" if options.utf8 else "ascii")
                     if text != "":
-                        print(f"upload {info.filePath()} as {renamedF}")
-                        submission.uploadFile(renamedF, text, overwrite=options.overwrite)
+                        if submission.uploadFile(renamedF, text, overwrite=options.overwrite, manifest=manifest):
+                            print(f"upload {info.filePath()} as {renamedF}")
+                        else:
+                            print(f"{info.filePath()} is unchanged")
         else:
             for f in files:
                 info = FileInfo(cwd, f)
                 if info.filePath() in studentFiles:
-                    text = info.contentsOf()
+                    text = info.contentsOf("utf8" if options.utf8 else "ascii")
                     if text != "":
-                        print(f"upload {info.filePath()}")
-                        submission.uploadFile(f, text, overwrite=options.overwrite)
+                        if submission.uploadFile(f, text, overwrite=options.overwrite, manifest=manifest):
+                            print(f"upload {info.filePath()}")
+                        else:
+                            print(f"{info.filePath()} is unchanged")
             print()
+        manifest.save()
 
 
 # ----------------------------------------------------------------------
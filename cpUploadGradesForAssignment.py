@@ -12,49 +12,40 @@ from FileUtils import *
 
 # ----------------------------------------------------------------------
 
-def main():
-    parser = ArgumentParser(description='upload specified files to a codepost.io assignment for all students')
-    parser.add_argument('--course-prefix', dest='coursePrefix', default='CS',
-                        help='''directory prefix for course names (i.e., if all your codepost.io course names and 
-                        local directories start with CS such as CS160 then use the default
-                        ''')
-    parser.add_argument('-c', '--course-name', dest='course', default=None,
-                        help='''name of course, if no name supplied, will try to find directory with coursePrefix in
-                        the current working directory's parent directories
-                        ''')
-    parser.add_argument('-a', '--assignment-name', dest='assignment', default=None,
-                        help='''name of assignment, if no name supplied will try to find directory with coursePrefix
-                        and use directory after it as the assignment name
-                        ''')
+def main(args: list = None, prog: str = None):
+    parser = ArgumentParser(prog=prog,
+                            description='upload specified files to a codepost.io assignment for all students')
+    CP.addCourseOptions(parser)
     parser.add_argument('-d', '--directory', dest='oneDirectory', default=None,
                         help='''just upload files for the one specified student directory''')
     parser.add_argument('-g', '--grade-file', dest='gradeFilename', default='grade.txt',
                         help='''name of file to upload contents for rubric''')
+    parser.add_argument('--utf8', dest='utf8', action='store_true',
+                        help='''upload files as UTF-8 instead of removing any characters that are not ASCII''')
+    CP.addOptions(parser, workers=None)
 
-    options = parser.parse_args()
-    if options.course is None:
-        course, _, _, _ = FileInfo.infoForFilePath(os.getcwd(), options.coursePrefix)
-    else:
-        course = options.course
-
-    if options.assignment is None:
-        _, assignment, _, _ = FileInfo.infoForFilePath(os.getcwd(), options.coursePrefix)
-    else:
-        assignment = options.assignment
+    options = parser.parse_args(args)
+    course, assignment = CP.courseAndAssignment(options)
 
-    CP.init()
+    CP.initFromOptions(options)
     cpCourse = CP.course(course)
-    cpAssignment = cpCourse.assignment(assignment)
+    # with -d only the student's submission is retrieved
+    student = None if options.oneDirectory is None else FileInfo.filenameForFilePath(options.oneDirectory)
+    cpAssignment = cpCourse.assignment(assignment, student)
 
     print(course, assignment)
 
     cwd = os.getcwd()
     if options.oneDirectory is not None:
+        directoryInfo = DirectoryInfo(cwd)
         directories = [options.oneDirectory]
     else:
-        directoryInfo = DirectoryInfo(cwd)
+        # scan the assignment directory and all the student directories at once
+        directoryInfo = DirectoryInfo.forAssignment(cwd)
         directories = directoryInfo.directories()
 
+    manifest = CPManifest(cwd, assignment)
+
     for directory in directories:
         # if it appears to be a directory with an email address name
         if "@" in directory:
@@ -63,7 +54,7 @@ def main():
             studentEmail = FileInfo.filenameForFilePath(directory)
 
             # get files in the student directory
-            studentDirectory = DirectoryInfo(cwd, directory)
+            studentDirectory = directoryInfo.subdirectory(directory)
             studentFiles = studentDirectory.files()
 
             # if we have some files
@@ -77,13 +68,17 @@ def main():
                 # upload 1rubric.txt as grade.txt (names can be overridden by command line arguments)
                 info = FileInfo(cwd, studentEmail, '1rubric.txt')
                 if info.filePath() in studentFiles:
-                    text = info.contentsOf()
+                    text = info.contentsOf("utf8" if options.utf8 else "ascii")
                     if text != "":
-                        print(f"upload {info.filePath()} as {options.gradeFilename}")
-                        submission.uploadFile(options.gradeFilename, text, overwrite=True)
+                        if submission.uploadFile(options.gradeFilename, text, overwrite=True, manifest=manifest):
+                            print(f"upload {info.filePath()} as {options.gradeFilename}")
+                        else:
+                            print(f"{info.filePath()} is unchanged")
 
             print()
 
+    manifest.save()
+
 
 # ----------------------------------------------------------------------
 